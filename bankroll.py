@@ -0,0 +1,211 @@
+"""
+Симуляция банкролла и риска разорения на NumPy.
+Распределение исходов раунда (включая удвоение) оценивается пакетной раздачей batch.play
+по таблице выплат relative_payments_messages, после чего paths независимых банкроллов
+проходят rounds раундов одновременно: один раунд - несколько операций над массивами
+"""
+
+import argparse
+import numpy as np
+import batch
+import engine
+from rng import RandomService, as_generator
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# размер таблицы выборки исходов: вероятности округляются до 1 / 2 ** 20
+SAMPLE_BITS = 20
+
+
+class OutcomeDistribution:
+    """
+    Распределение исходов раунда: исход из relative_payments_messages и удвоение.
+    values - выигрыш в ставках, fallback - выигрыш, если на удвоение не хватает денег
+    (приближённо считается, что игрок доигрывает раунд без удвоения с тем же исходом)
+    """
+
+    def __init__(self, values, fallback, probabilities):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.fallback = np.asarray(fallback, dtype=np.float64)
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        cdf = np.cumsum(self.probabilities)
+        cdf[-1] = 1.0
+        # номер исхода для каждого из 2 ** SAMPLE_BITS равновероятных случайных чисел:
+        # выборка - одно обращение к таблице вместо двоичного поиска по cdf
+        self.table = np.searchsorted(cdf, (np.arange(1 << SAMPLE_BITS) + 0.5) / (1 << SAMPLE_BITS)).astype(np.uint8)
+
+    @classmethod
+    def from_batch(cls, rounds=1_000_000, stand_on=17, double_on=(10, 11), rng=None):
+        """ Оценивает распределение по rounds раундам batch.play с той же стратегией игрока """
+
+        result = batch.play(rounds, stand_on, double_on, rng)
+        # категория = исход * 2 + удвоение
+        categories = np.bincount(result.outcomes * 2 + result.doubled, minlength=len(batch.OUTCOMES) * 2)
+        codes = np.flatnonzero(categories)
+        outcomes, doubled = codes // 2, codes % 2
+        return cls(batch.PAYMENTS[outcomes] * np.where(doubled, 2, 1), batch.PAYMENTS[outcomes],
+                   categories[codes] / rounds)
+
+    def sample(self, rng, n):
+        """ Номера n случайных исходов """
+
+        return self.table[rng.integers(0, len(self.table), n, dtype=np.uint32)]
+
+    def mean(self):
+        """ Ожидаемый выигрыш раунда в ставках """
+
+        return float(self.values @ self.probabilities)
+
+
+class FlatBet:
+    """ Одинаковая ставка каждый раунд """
+
+    def __init__(self, bet):
+        self.bet = bet
+
+    def __call__(self, balances, results):
+        return np.full(balances.shape, self.bet, dtype=np.int64)
+
+
+class ProportionalBet:
+    """ Ставка - доля текущего банкролла """
+
+    def __init__(self, fraction):
+        self.fraction = fraction
+
+    def __call__(self, balances, results):
+        return (balances * self.fraction).astype(np.int64)
+
+
+class Martingale:
+    """ Ставка умножается на multiplier после проигрыша и возвращается к base после выигрыша """
+
+    def __init__(self, base, multiplier=2):
+        self.base = base
+        self.multiplier = multiplier
+        self.bets = None
+
+    def __call__(self, balances, results):
+        if results is None or self.bets is None:
+            self.bets = np.full(balances.shape, self.base, dtype=np.int64)
+        else:
+            self.bets = np.where(results < 0, self.bets * self.multiplier,
+                                 np.where(results > 0, self.base, self.bets))
+        return self.bets
+
+
+POLICIES = {"flat": FlatBet, "proportional": ProportionalBet, "martingale": Martingale}
+
+
+class BankrollResult:
+    """ Итоги симуляции: разорения, итоговые банкроллы и квантили банкролла по раундам """
+
+    def __init__(self, balances, ruin_rounds, checkpoints, quantiles, quantile_paths, rounds):
+        self.balances = balances
+        # номер раунда, после которого банкролл разорился, или -1
+        self.ruin_rounds = ruin_rounds
+        self.checkpoints = checkpoints
+        self.quantiles = quantiles
+        # квантиль -> банкролл этого квантиля в каждой контрольной точке
+        self.quantile_paths = quantile_paths
+        self.rounds = rounds
+
+    def risk_of_ruin(self):
+        """ Доля разорившихся банкроллов """
+
+        return float((self.ruin_rounds >= 0).mean())
+
+    def median_path(self):
+        """ Медианный банкролл в каждой контрольной точке """
+
+        return self.quantile_paths[0.5]
+
+    def ruin_histogram(self, bins=20):
+        """ Гистограмма времени до разорения: (количество, границы интервалов в раундах) """
+
+        return np.histogram(self.ruin_rounds[self.ruin_rounds >= 0], bins=bins, range=(0, self.rounds))
+
+    def summary(self):
+        """ Отчёт в виде текста """
+
+        lines = [f"paths {len(self.balances)}, rounds {self.rounds}",
+                 f"risk of ruin {self.risk_of_ruin():.4%}",
+                 "final balance quantiles: " + "  ".join(f"{q:g}: {path[-1]:.0f}"
+                                                         for q, path in self.quantile_paths.items())]
+        ruined = self.ruin_rounds[self.ruin_rounds >= 0]
+        if len(ruined):
+            lines.append(f"rounds to ruin: median {np.median(ruined):.0f}, mean {ruined.mean():.0f}")
+            counts, edges = self.ruin_histogram()
+            top = counts.max()
+            for count, left, right in zip(counts, edges, edges[1:]):
+                lines.append(f"  {left:7.0f}-{right:<7.0f} {count:8d} {'#' * int(40 * count / top)}")
+        return "\n".join(lines)
+
+
+def simulate(distribution, policy, paths=100_000, rounds=1000, balance=engine.DEFAULT_BALANCE, min_bet=1,
+             max_bet=None, quantiles=QUANTILES, checkpoints=100, rng=None):
+    """
+    Проводит paths банкроллов через rounds раундов. Ставка политики policy(balances, results)
+    ограничивается лимитами стола и банкроллом, как в engine.Round.place_bid. Банкролл разоряется,
+    когда он меньше минимальной ставки. Выплата округляется к нулю, как в engine.Round.settle
+    """
+
+    rng = as_generator(rng)
+    balances = np.full(paths, balance, dtype=np.int64)
+    ruin_rounds = np.full(paths, -1, dtype=np.int64)
+    active = balances >= min_bet
+    ruin_rounds[~active] = 0
+    results = None
+
+    step = max(1, rounds // checkpoints)
+    checkpoint_rounds = [0]
+    quantile_rows = [np.quantile(balances, quantiles)]
+    for round_index in range(1, rounds + 1):
+        bets = np.clip(policy(balances, results), min_bet, max_bet)
+        bets = np.where(active, np.minimum(bets, balances), 0)
+        codes = distribution.sample(rng, paths)
+        # удвоение возможно, только если банкролла хватает на двойную ставку (engine.Round.can_double)
+        results = np.where(balances >= bets * 2, distribution.values[codes], distribution.fallback[codes])
+        balances += np.trunc(bets * results).astype(np.int64)
+
+        ruined = active & (balances < min_bet)
+        ruin_rounds[ruined] = round_index
+        active &= ~ruined
+        if round_index % step == 0 or round_index == rounds:
+            checkpoint_rounds.append(round_index)
+            quantile_rows.append(np.quantile(balances, quantiles))
+        if not active.any():
+            break
+
+    quantile_rows = np.array(quantile_rows)
+    quantile_paths = {q: quantile_rows[:, i] for i, q in enumerate(quantiles)}
+    return BankrollResult(balances, ruin_rounds, np.array(checkpoint_rounds), quantiles, quantile_paths, rounds)
+
+
+def main():
+    """ Симуляция из командной строки """
+
+    parser = argparse.ArgumentParser(description="Vectorized bankroll and risk-of-ruin simulation")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--balance", type=int, default=engine.DEFAULT_BALANCE)
+    parser.add_argument("--policy", choices=list(POLICIES), default="flat")
+    parser.add_argument("--bet", type=float, default=10,
+                        help="flat bet, martingale base bet or proportional fraction of the bankroll")
+    parser.add_argument("--min-bet", type=int, default=1)
+    parser.add_argument("--max-bet", type=int)
+    parser.add_argument("--stand-on", type=int, default=17)
+    parser.add_argument("--double-on", type=int, nargs="*", default=[10, 11])
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    rng = RandomService(args.seed).numpy()
+    distribution = OutcomeDistribution.from_batch(stand_on=args.stand_on, double_on=tuple(args.double_on), rng=rng)
+    print(f"expected value per round: {distribution.mean():+.4f} bets")
+    bet = args.bet if args.policy == "proportional" else int(args.bet)
+    result = simulate(distribution, POLICIES[args.policy](bet), args.paths, args.rounds, args.balance,
+                      args.min_bet, args.max_bet, rng=rng)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
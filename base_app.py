@@ -1,14 +1,17 @@
 """ Содержит базовый класс приложения. """
 
-from update import *
 import pygame
 import time
+import config
+from objects import PerformanceOverlay
+from profiling import startup, FrameStats
+from update import Game
 
 
 class App:
     """ Базовый класс для создания оконных приложений """
 
-    def __init__(self, app_name=None):
+    def __init__(self, app_name=None, width=0, height=0, display_mode=pygame.FULLSCREEN):
         def init_display(display_width, display_height, display_mode):
             """ Инициализация окна """
 
@@ -22,43 +25,124 @@ class App:
             self.H_WIDTH = self.WIDTH / 2
             self.H_HEIGHT = self.HEIGHT / 2
 
-        pygame.init()
+        # инициализируются только используемые подсистемы pygame
+        pygame.display.init()
+        pygame.font.init()
+        startup.mark("pygame init")
 
         if app_name is None:
             self.NAME = "Base App"
         else:
             self.NAME = app_name
-        self.INIT_WIDTH = 0
-        self.INIT_HEIGHT = 0
-        self.INIT_DISPLAY_MODE = pygame.FULLSCREEN
+        self.INIT_WIDTH = width
+        self.INIT_HEIGHT = height
+        self.INIT_DISPLAY_MODE = display_mode
         init_display(self.INIT_WIDTH, self.INIT_HEIGHT, self.INIT_DISPLAY_MODE)
         pygame.display.set_caption(self.NAME)
+        startup.mark("display")
         self.CLOCK = pygame.time.Clock()
         self.MAX_FPS = 60
         self.delta_time = 0.01
         self.RUN = True
         self.last_time = time.time()
+        self.first_frame = True
+        # окно активно (в фокусе и не свёрнуто)
+        self.focused = True
+        # сколько секунд последний кадр ждал событий (не входит во время кадра)
+        self.idle_time = 0.0
+        self.frame_stats = FrameStats(config.FRAME_STATS_SIZE, self.MAX_FPS)
+        # окно статистики кадров создаётся при первом нажатии F3
+        self.overlay = None
 
         self.game = Game(self)
+        startup.mark("game init")
 
     def run(self):
         """ Главный цикл приложения """
 
         while self.RUN:
-            events = pygame.event.get()
-            keys = pygame.key.get_pressed()
+            self.frame()
 
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.RUN = False
+        self.game.close()
+        if config.FRAME_STATS_CSV:
+            self.frame_stats.dump_csv(config.FRAME_STATS_CSV)
 
-            mouse_buttons = pygame.mouse.get_pressed()
-            mouse_position = list(pygame.mouse.get_pos())
-            now_time = time.time()
-            self.delta_time = now_time - self.last_time
-            self.last_time = now_time
+    def frame(self):
+        """ Один кадр главного цикла """
 
-            self.game.update(mouse_buttons, mouse_position, events, keys)
+        frame_start = time.perf_counter()
+        events = self.get_events()
 
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.RUN = False
+            if event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+                self.focused = False
+            if event.type in (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED):
+                self.focused = True
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+                startup.dump(config.STARTUP_PROFILE_PATH)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.toggle_overlay()
+
+        now_time = time.time()
+        self.delta_time = now_time - self.last_time
+        self.last_time = now_time
+        events_end = time.perf_counter()
+
+        self.game.update(events)
+        logic_end = time.perf_counter()
+
+        if self.overlay is not None and self.overlay.visible:
+            self.overlay.refresh(logic_end)
+        rects = self.game.draw()
+        draw_end = time.perf_counter()
+
+        if rects is None:
             pygame.display.update()
-            self.CLOCK.tick(self.MAX_FPS)
+        else:
+            pygame.display.update(rects)
+
+        if self.first_frame:
+            self.first_frame = False
+            startup.mark("first frame")
+            if config.STARTUP_PROFILE:
+                startup.dump(config.STARTUP_PROFILE_PATH)
+        # без фокуса окна кадры намеренно реже, и пропущенными они считаются по этой частоте
+        fps = self.MAX_FPS if self.focused else config.UNFOCUSED_FPS
+        self.CLOCK.tick(fps)
+
+        frame_end = time.perf_counter()
+        self.frame_stats.add(events_end - frame_start - self.idle_time, logic_end - events_end, draw_end - logic_end,
+                             frame_end - draw_end, fps)
+
+    def get_events(self):
+        """
+        Возвращает события кадра. Если в игре ничего не анимируется, вместо отрисовки кадров
+        с полной частотой ждёт события не дольше config.IDLE_TIMEOUT (время ожидания - в idle_time)
+        """
+
+        self.idle_time = 0.0
+        if not config.IDLE_WAIT or self.game.is_animating():
+            return pygame.event.get()
+
+        timeout = config.IDLE_TIMEOUT if self.focused else config.UNFOCUSED_IDLE_TIMEOUT
+        if self.overlay is not None and self.overlay.visible:
+            timeout = min(timeout, int(self.overlay.refresh_time * 1000))
+        wait_start = time.perf_counter()
+        event = pygame.event.wait(timeout)
+        # время ожидания не считается временем кадра
+        self.idle_time = time.perf_counter() - wait_start
+        self.last_time = time.time()
+        events = pygame.event.get()
+        if event.type != pygame.NOEVENT:
+            events.insert(0, event)
+        return events
+
+    def toggle_overlay(self):
+        """ Показывает или скрывает окно статистики кадров """
+
+        if self.overlay is None:
+            self.overlay = PerformanceOverlay(self.game, self.frame_stats)
+        self.overlay.visible = not self.overlay.visible
+        self.overlay.last_refresh = None
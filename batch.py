@@ -0,0 +1,145 @@
+"""
+Пакетная раздача и подсчёт рук на NumPy для массовых симуляций.
+N столов разыгрываются одновременно: каждая рука представлена массивами целых чисел,
+а правила (включая добор крупье до 17 из update.Game.dealer_turn) применяются как операции над массивами
+"""
+
+import numpy as np
+import game_objects
+from engine import OUTCOMES, OUTCOME_CODES
+from messages import relative_payments_messages
+from rng import as_generator
+
+# номер карты совпадает с game_objects.Card.index
+DECK_SIZE = 52
+CARD_VALUES = np.array(game_objects.CARD_VALUES)
+CARD_POINTS = np.array(game_objects.CARD_POINTS)
+
+PAYMENTS = np.array([relative_payments_messages[key] for key in OUTCOMES])
+
+PLAYER_BUSTS = OUTCOME_CODES["player_busts"]
+DEALER_BUSTS = OUTCOME_CODES["dealer_busts"]
+BLACK_JACK = OUTCOME_CODES["black_jack"]
+PLAYER_WINS = OUTCOME_CODES["player_wins"]
+DEALER_WINS = OUTCOME_CODES["dealer_wins"]
+TIE = OUTCOME_CODES["tie"]
+
+
+def shuffled_decks(n, rng=None):
+    """ Возвращает массив (n, 52) с n независимо перемешанными колодами (rng - rng.RandomService или генератор NumPy) """
+
+    return as_generator(rng).random((n, DECK_SIZE)).argsort(axis=1).astype(np.int8)
+
+
+def hand_totals(points):
+    """
+    Вычисляет счёт рук по массиву очков карт (n, k), где 0 означает отсутствие карты.
+    Возвращает массивы счёта и признака мягкой руки (туз считается за 11)
+    """
+
+    points = np.asarray(points)
+    hard = np.where(points == 11, 1, points).sum(axis=1)
+    has_ace = (points == 11).any(axis=1)
+    soft = has_ace & (hard + 10 <= 21)
+    return np.where(soft, hard + 10, hard), soft
+
+
+class Hands:
+    """ Руки на n столах: жёсткий счёт (тузы по 1 очку), наличие туза и количество карт """
+
+    def __init__(self, n):
+        self.hard = np.zeros(n, dtype=np.int16)
+        self.has_ace = np.zeros(n, dtype=bool)
+        self.count = np.zeros(n, dtype=np.int16)
+
+    def add(self, points, mask):
+        """ Добавляет карты с очками points рукам, отмеченным mask """
+
+        self.hard += np.where(mask, np.where(points == 11, 1, points), 0).astype(np.int16)
+        self.has_ace |= mask & (points == 11)
+        self.count += mask
+
+    def soft(self):
+        """ Признак мягкой руки """
+
+        return self.has_ace & (self.hard + 10 <= 21)
+
+    def value(self):
+        """ Общий счёт рук, как в game_objects.Player.get_value """
+
+        return np.where(self.soft(), self.hard + 10, self.hard)
+
+
+class BatchResult:
+    """ Результаты n раундов """
+
+    def __init__(self, outcomes, doubled, player_values, dealer_values):
+        self.outcomes = outcomes
+        self.doubled = doubled
+        self.player_values = player_values
+        self.dealer_values = dealer_values
+        # выигрыш в ставках: коэффициент из relative_payments_messages, удвоенный при удвоении ставки
+        self.units = PAYMENTS[outcomes] * np.where(doubled, 2, 1)
+
+    def counts(self):
+        """ Количество раундов по каждому исходу """
+
+        counts = np.bincount(self.outcomes, minlength=len(OUTCOMES))
+        return {key: int(counts[i]) for i, key in enumerate(OUTCOMES)}
+
+    def net_units(self):
+        """ Суммарный выигрыш игрока в ставках """
+
+        return float(self.units.sum())
+
+
+def play(n, stand_on=17, double_on=(), rng=None, decks=None):
+    """
+    Разыгрывает n раундов одновременно.
+    Игрок берёт карты, пока счёт меньше stand_on, и удваивает ставку двумя картами
+    с жёстким счётом из double_on. Крупье берёт карты, пока у него меньше 17
+    """
+
+    if decks is None:
+        decks = shuffled_decks(n, rng)
+    points = CARD_POINTS[decks]
+    rows = np.arange(n)
+    top = np.zeros(n, dtype=np.int16)
+
+    def deal(hands, mask):
+        hands.add(points[rows, top], mask)
+        top[:] += mask
+
+    everyone = np.ones(n, dtype=bool)
+    player = Hands(n)
+    dealer = Hands(n)
+    deal(player, everyone)
+    deal(player, everyone)
+    deal(dealer, everyone)
+    deal(dealer, everyone)
+
+    # удвоение: ровно одна карта после двух начальных
+    doubled = np.isin(player.value(), double_on) & ~player.soft()
+    deal(player, doubled)
+
+    active = ~doubled & (player.value() < stand_on)
+    while active.any():
+        deal(player, active)
+        active &= player.value() < stand_on
+
+    player_values = player.value()
+    player_bust = player_values > 21
+
+    active = ~player_bust & (dealer.value() < 17)
+    while active.any():
+        deal(dealer, active)
+        active &= dealer.value() < 17
+
+    dealer_values = dealer.value()
+    outcomes = np.select(
+        [player_bust, dealer_values > 21, player_values > dealer_values, player_values < dealer_values],
+        [PLAYER_BUSTS, DEALER_BUSTS, PLAYER_WINS, DEALER_WINS],
+        TIE
+    )
+    outcomes = np.where((player.count == 2) & (player_values == 21), BLACK_JACK, outcomes)
+    return BatchResult(outcomes, doubled, player_values, dealer_values)
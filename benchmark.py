@@ -0,0 +1,200 @@
+"""
+Бенчмарк отрисовки без окна.
+Запускает base_app.App с драйвером SDL "dummy" и экраном фиксированного размера,
+проводит каждую фазу игры фиксированное количество кадров и сохраняет FPS
+и распределение времени кадров в JSON, чтобы сравнивать результаты разных версий:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import json
+import subprocess
+import sys
+import tempfile
+import pygame
+import config
+import engine
+import rng
+from base_app import App
+from profiling import FrameStats
+
+
+def set_bid(game, bid=10):
+    """ Начинает раунд в фазе игры со ставкой bid """
+
+    game.change_mode("game")
+    game.bid_entry.text = str(bid)
+    game.check_start_game()
+
+
+def deal_player_cards(count):
+    """ Возвращает подготовку фазы игры с count картами игрока на столе (без проверки правил) """
+
+    def prepare(game):
+        set_bid(game)
+        while len(game.player.cards) < count:
+            game.player.add_card(game.shoe.deal_card())
+        game.show_player_cards()
+
+    return prepare
+
+
+def change_mode(mode):
+    """ Возвращает подготовку фазы mode """
+
+    return lambda game: game.change_mode(mode)
+
+
+def scroll_events(game):
+    """ Прокрутка текста колесом мыши вниз и вверх """
+
+    direction = -1 if (game.app.frame_stats.frames // 20) % 2 == 0 else 1
+    return [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=direction)]
+
+
+def prepare_finish(game):
+    """ Доводит раунд до экрана финиша """
+
+    set_bid(game)
+    game.round.step(engine.STAND)
+    game.show_dealer_cards()
+    game.finish()
+
+
+# название сценария -> (подготовка фазы игры, события для каждого кадра)
+SCENARIOS = {
+    "menu": (change_mode("menu"), None),
+    "rules": (change_mode("rules"), scroll_events),
+    "info": (change_mode("info"), scroll_events),
+    "bet": (change_mode("game"), None),
+    "game_2_cards": (deal_player_cards(2), None),
+    "game_6_cards": (deal_player_cards(6), None),
+    "game_10_cards": (deal_player_cards(10), None),
+    "finish": (prepare_finish, None),
+}
+
+
+def run_scenario(app, prepare, events, frames):
+    """ Готовит фазу игры и проводит её frames кадров. Возвращает статистику времени кадров """
+
+    prepare(app.game)
+    app.frame_stats = FrameStats(frames)
+    for _ in range(frames):
+        if events is not None:
+            for event in events(app.game):
+                pygame.event.post(event)
+        app.frame()
+
+    result = {"frames": frames, "fps": app.frame_stats.fps(), "dropped": app.frame_stats.dropped}
+    for section in FrameStats.SECTIONS:
+        values = app.frame_stats.values(section)
+        p50, p95, p99 = app.frame_stats.percentiles(section)
+        result[section] = {"mean_ms": sum(values) / len(values) * 1000, "p50_ms": p50 * 1000,
+                           "p95_ms": p95 * 1000, "p99_ms": p99 * 1000, "max_ms": max(values) * 1000}
+    return result
+
+
+def git_revision():
+    """ Текущая ревизия git, если она доступна """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def temporary_data():
+    """ Журнал банкролла, история раундов и money.txt во временной папке, чтобы ставки не меняли баланс игрока """
+
+    paths = config.LEDGER_PATH, config.HISTORY_PATH, config.SAVE_MONEY_PATH
+    with tempfile.TemporaryDirectory() as data_path:
+        config.LEDGER_PATH = os.path.join(data_path, "ledger.bin")
+        config.HISTORY_PATH = os.path.join(data_path, "history.bin")
+        config.SAVE_MONEY_PATH = os.path.join(data_path, "money.txt")
+        try:
+            yield data_path
+        finally:
+            config.LEDGER_PATH, config.HISTORY_PATH, config.SAVE_MONEY_PATH = paths
+
+
+def run(frames=300, width=1920, height=1080, scenarios=None, seed=0):
+    """ Проводит все сценарии (или только перечисленные) и возвращает результаты """
+
+    rng.set_default_service(rng.RandomService(seed))
+    # кадры рисуются и без событий
+    config.IDLE_WAIT = False
+    results = {}
+    with temporary_data():
+        app = App("Black Jack benchmark", width, height, 0)
+        # кадры не ограничиваются частотой MAX_FPS
+        app.MAX_FPS = 0
+        try:
+            for name in scenarios or SCENARIOS:
+                prepare, events = SCENARIOS[name]
+                results[name] = run_scenario(app, prepare, events, frames)
+        finally:
+            # журнал и история закрываются до удаления временной папки
+            app.game.close()
+            pygame.quit()
+
+    return {"revision": git_revision(), "driver": os.environ["SDL_VIDEODRIVER"], "size": [width, height],
+            "dirty_rects": config.DIRTY_RECTS, "frames": frames, "scenarios": results}
+
+
+def compare(old, new):
+    """ Строки сравнения среднего времени кадра двух запусков """
+
+    lines = [f"{'scenario':<16} {'old ms':>9} {'new ms':>9} {'change':>8}"]
+    for name, result in new["scenarios"].items():
+        if name not in old["scenarios"]:
+            continue
+        old_ms = old["scenarios"][name]["frame"]["mean_ms"]
+        new_ms = result["frame"]["mean_ms"]
+        lines.append(f"{name:<16} {old_ms:9.3f} {new_ms:9.3f} {(new_ms / old_ms - 1) * 100:+7.1f}%")
+    return lines
+
+
+def main():
+    """ Запуск бенчмарка из командной строки """
+
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark of all game modes")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--full-redraw", action="store_true", help="disable dirty rectangles rendering")
+    parser.add_argument("--output", help="path of the JSON results file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    args = parser.parse_args()
+
+    if args.full_redraw:
+        config.DIRTY_RECTS = False
+    results = run(args.frames, args.width, args.height, args.scenario)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    for name, result in results["scenarios"].items():
+        frame = result["frame"]
+        print(f"{name:<16} {result['fps']:9.1f} fps  p50 {frame['p50_ms']:.3f}  p95 {frame['p95_ms']:.3f}  "
+              f"p99 {frame['p99_ms']:.3f} ms", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as file:
+            print("\n".join(compare(json.load(file), results)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Атлас спрайтов карт.
+Изображение cards.png загружается и масштабируется один раз для каждого разрешения,
+а каждая карта получает готовую подповерхность атласа
+"""
+
+import pygame
+from profiling import startup
+
+# значение рубашки карты в атласе
+BACK_VALUE = 15
+BACK_SUIT = 2
+
+_atlases = {}
+
+
+class CardAtlas:
+    """ Загруженный и нарезанный на отдельные карты атлас """
+
+    def __init__(self, path="cards.png", size=(2529, 947), card_size=(160, 230), margin=(11.5, 9),
+                 colorkey=(0, 0, 0)):
+        self.path = path
+        self.size = tuple(size)
+        self.card_size = tuple(card_size)
+        self.margin = tuple(margin)
+        self.colorkey = colorkey
+
+        image = pygame.transform.scale(pygame.image.load(path), self.size)
+        # карты рисуются на непрозрачной поверхности с colorkey, как и раньше в objects.Card
+        self.surface = pygame.Surface(self.size)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.surface.blit(image, (0, 0))
+        self.surface.set_colorkey(self.colorkey)
+
+        self.sprites = {}
+        for value in range(2, 15):
+            for suit in range(4):
+                self.sprites[(value, suit)] = self.cut(value, suit)
+        self.sprites[(BACK_VALUE, BACK_SUIT)] = self.cut(BACK_VALUE, BACK_SUIT)
+        # спрайты по номеру карты game_objects.Card.index (0-51)
+        self.card_sprites = [self.sprites[(value, suit)] for value in range(2, 15) for suit in range(4)]
+
+    def cut(self, value, suit):
+        """ Вырезает из атласа подповерхность одной карты """
+
+        x = int((value - 2) * (self.card_size[0] + self.margin[0]))
+        y = int(suit * (self.card_size[1] + self.margin[1]))
+        return self.surface.subsurface(pygame.Rect((x, y), self.card_size))
+
+    def get(self, value, suit):
+        """ Возвращает спрайт карты по её значению и масти """
+
+        return self.sprites[(value, suit)]
+
+    def sprite(self, card):
+        """ Возвращает спрайт карты game_objects.Card """
+
+        return self.card_sprites[card.index]
+
+    def back(self):
+        """ Возвращает спрайт рубашки карты """
+
+        return self.sprites[(BACK_VALUE, BACK_SUIT)]
+
+
+def get_atlas(path="cards.png", size=(2529, 947), card_size=(160, 230), margin=(11.5, 9)):
+    """ Возвращает общий атлас для данного файла и разрешения, загружая его только при первом обращении """
+
+    key = (path, tuple(size), tuple(card_size), tuple(margin))
+    if key not in _atlases:
+        with startup.measure(path):
+            _atlases[key] = CardAtlas(path, size, card_size, margin)
+    return _atlases[key]
+
+
+def clear_atlases():
+    """ Удаляет все загруженные атласы (например, после пересоздания окна) """
+
+    _atlases.clear()
@@ -1,3 +1,53 @@
 """ Конфигурация """
 
+# журнал банкролла (снимок баланса хранится рядом в файле с суффиксом .snapshot).
+# Баланс из старого файла SAVE_MONEY_PATH переносится в новый журнал
+LEDGER_PATH = "ledger.bin"
 SAVE_MONEY_PATH = "money.txt"
+# fsync журнала: "always" - после каждого раунда, "group" - после каждой группы записей, "never" - решает ОС.
+# Группа записывается, когда в ней GROUP_SIZE записей или её первая запись ждёт дольше GROUP_TIME секунд
+# (проверяется при добавлении записи). Игра сбрасывает журнал после каждого раунда, группы - для пакетной записи
+LEDGER_FSYNC = "group"
+LEDGER_GROUP_SIZE = 16
+LEDGER_GROUP_TIME = 1.0
+# через сколько записей сохраняется снимок баланса
+LEDGER_SNAPSHOT_INTERVAL = 1000
+
+# двоичная история раундов для проверки повторным розыгрышем (python history.py replay history.bin).
+# None - история не ведётся. Раунды записываются блоками по HISTORY_BLOCK_RECORDS, блоки сжимаются zlib
+HISTORY_PATH = "history.bin"
+HISTORY_COMPRESS = True
+HISTORY_BLOCK_RECORDS = 16
+
+# башмак: количество колод (1-8) и доля карт, после раздачи которой башмак перемешивается
+SHOE_DECKS = 6
+SHOE_PENETRATION = 0.75
+
+# зерно генератора, перемешивающего карты (rng.py). None - случайное зерно, его можно узнать
+# из rng.default_service().seed и задать здесь, чтобы воспроизвести раунды бит в бит
+RNG_SEED = None
+
+# перерисовывать только изменившиеся области экрана вместо всего кадра
+DIRTY_RECTS = True
+
+# вывести замеры времени запуска после первого кадра (по F2 - в любой момент).
+# Если путь не задан, отчёт выводится в stderr
+STARTUP_PROFILE = False
+STARTUP_PROFILE_PATH = None
+
+# количество последних кадров, по которым считается статистика времени кадров (окно статистики - F3),
+# и путь к CSV файлу, в который она сохраняется при выходе (None - не сохранять)
+FRAME_STATS_SIZE = 1000
+FRAME_STATS_CSV = None
+
+# ждать событий вместо отрисовки кадров с частотой MAX_FPS, когда в игре ничего не анимируется.
+# Время ожидания (в миллисекундах) для активного и неактивного или свёрнутого окна
+# и частота кадров неактивного окна во время анимаций
+IDLE_WAIT = True
+IDLE_TIMEOUT = 500
+UNFOCUSED_IDLE_TIMEOUT = 2000
+UNFOCUSED_FPS = 10
+
+# адрес сервера игры (python server.py serve)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5050
@@ -0,0 +1,114 @@
+"""
+Счёт карт по мере раздачи.
+CardCounter подписывается на колоду или башмак (game_objects.Deck/Shoe) и обновляет
+текущий счёт всех систем, истинный счёт и состав оставшихся карт за O(1) на карту,
+без пересчёта по уже розданным картам. Счёт сбрасывается при перемешивании башмака.
+Счёт включает только карты, которые видит игрок: закрытая карта крупье
+учитывается, когда она открывается (engine.Round.reveal_hole_card)
+"""
+
+from game_objects import CARD_RANKS
+
+# метки рангов (2-9, десятки и картинки, туз - как в CARD_RANKS) для каждой системы счёта
+TAGS = {
+    "hi_lo": (1, 1, 1, 1, 1, 0, 0, 0, -1, -1),
+    "ko": (1, 1, 1, 1, 1, 1, 0, 0, -1, -1),
+    "omega_ii": (1, 1, 2, 2, 2, 1, 0, -1, -2, 0),
+}
+# начальный счёт несбалансированных систем: IRC = offset - (сумма меток колоды) * количество колод
+INITIAL_OFFSETS = {"ko": 4}
+# количество карт каждого ранга в одной колоде
+RANK_COUNTS = (4, 4, 4, 4, 4, 4, 4, 4, 16, 4)
+
+
+def deck_sum(system):
+    """ Сумма меток одной колоды (0 для сбалансированных систем) """
+
+    return sum(tag * count for tag, count in zip(TAGS[system], RANK_COUNTS))
+
+
+class CardCounter:
+    """ Текущий и истинный счёт нескольких систем для колоды или башмака """
+
+    def __init__(self, deck, systems=tuple(TAGS)):
+        self.deck = deck
+        self.decks = deck.decks
+        self.systems = tuple(systems)
+        self.system_index = {system: i for i, system in enumerate(self.systems)}
+        # метки всех систем для каждой из 52 карт: card_tags[card.index] -> (метка первой системы, ...)
+        self.card_tags = tuple(tuple(TAGS[system][rank] for system in self.systems) for rank in CARD_RANKS)
+        self.initial = tuple(INITIAL_OFFSETS.get(system, 0) - deck_sum(system) * self.decks
+                             for system in self.systems)
+
+        self.running = []
+        self.counts = []
+        self.remaining_cards = 0
+        self.reset(self.unseen())
+        deck.add_listener(self)
+
+    def reset(self, composition=None):
+        """ Состояние счёта для полного башмака или, если задан, для состава оставшихся карт """
+
+        if composition is None:
+            composition = [count * self.decks for count in RANK_COUNTS]
+        self.counts = list(composition)
+        self.remaining_cards = sum(self.counts)
+        # счёт уже розданных карт восстанавливается по составу оставшихся
+        dealt = [count * self.decks - left for count, left in zip(RANK_COUNTS, self.counts)]
+        self.running = [initial + sum(TAGS[system][rank] * dealt[rank] for rank in range(10))
+                        for system, initial in zip(self.systems, self.initial)]
+
+    def card_dealt(self, card):
+        """ Учитывает открытую карту (розданную лицом вверх или открытую позже) """
+
+        running = self.running
+        for i, tag in enumerate(self.card_tags[card.index]):
+            running[i] += tag
+        self.counts[card.rank] -= 1
+        self.remaining_cards -= 1
+
+    def shuffled(self):
+        """
+        Башмак перемешан: счёт начинается заново. Если перемешан только сброс посреди раунда,
+        открытые карты на столе в новый башмак не попадают и остаются учтёнными
+        """
+
+        self.reset(self.unseen())
+
+    def unseen(self):
+        """ Состав карт, которых игрок не видел: у башмака - вместе с закрытыми картами на столе """
+
+        if hasattr(self.deck, "unseen"):
+            return self.deck.unseen()
+        return self.deck.composition()
+
+    def running_count(self, system="hi_lo"):
+        """ Текущий счёт системы """
+
+        return self.running[self.system_index[system]]
+
+    def decks_remaining(self):
+        """ Количество оставшихся колод (не меньше половины колоды, чтобы истинный счёт не взлетал в конце) """
+
+        return max(self.remaining_cards, 26) / 52
+
+    def true_count(self, system="hi_lo"):
+        """ Истинный счёт: текущий счёт на одну оставшуюся колоду """
+
+        return self.running_count(system) / self.decks_remaining()
+
+    def composition(self):
+        """ Состав оставшихся карт: количество карт рангов 2-9, десяток и тузов """
+
+        return tuple(self.counts)
+
+    def state(self):
+        """ Счёт всех систем одним словарём (например, для записи в каждой точке решения) """
+
+        decks_remaining = self.decks_remaining()
+        return {
+            "remaining": self.remaining_cards,
+            "composition": self.composition(),
+            "running": dict(zip(self.systems, self.running)),
+            "true": {system: running / decks_remaining for system, running in zip(self.systems, self.running)},
+        }
@@ -0,0 +1,203 @@
+"""
+Точное распределение итогового счёта крупье по составу оставшихся карт.
+Состав колоды - вектор из 10 чисел (количество карт рангов 2, 3, ..., 9, десятки/картинки, тузы).
+Вероятность того, что крупье доберёт набор карт D, зависит от состава только через
+произведение убывающих факториалов counts[r] * (counts[r] - 1) * ... / (N * (N - 1) * ...),
+а не через порядок карт. Поэтому подзадачи - деревья добора от каждого счёта (total, soft):
+наборы карт, на которых крупье останавливается, их итог и количество порядков добора -
+от состава не зависят и общие для всех составов. Запрос для соседнего состава (например,
+после удаления одной карты) использует уже построенные деревья и только пересчитывает веса.
+Готовые распределения по составам хранятся в ограниченном LRU кэше
+"""
+
+from collections import OrderedDict
+from math import factorial
+from game_objects import next_hand as add_card
+
+# индекс ранга -> очки карты
+RANK_POINTS = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+TEN = 8
+ACE = 9
+FULL_DECK = (4, 4, 4, 4, 4, 4, 4, 4, 16, 4)
+
+# итоговые счета: меньше 17 (в колоде закончились карты), 17, 18, 19, 20, 21 и перебор
+FINALS = ("under_17", 17, 18, 19, 20, 21, "bust")
+UNDER_17 = 0
+BUST = 6
+MAX_DRAWS = 20
+
+
+def composition(cards):
+    """ Вектор состава для списка карт game_objects.Card """
+
+    counts = [0] * 10
+    for card in cards:
+        counts[card.rank] += 1
+    return tuple(counts)
+
+
+def remove(counts, rank):
+    """ Возвращает состав без одной карты ранга rank """
+
+    if counts[rank] == 0:
+        raise ValueError(f"No cards of rank {RANK_POINTS[rank]} left")
+    return counts[:rank] + (counts[rank] - 1,) + counts[rank + 1:]
+
+
+def _add(drawn, rank):
+    """ Набор карт drawn с ещё одной картой ранга rank """
+
+    return drawn[:rank] + (drawn[rank] + 1,) + drawn[rank + 1:]
+
+
+class DrawTree:
+    """
+    Все способы добора крупье от счёта (total, soft), не зависящие от состава колоды:
+    stops - набор карт -> [номер итога в FINALS, количество порядков добора, при которых крупье остановился на нём],
+    open - набор карт -> количество порядков, после которых крупье ещё берёт карты (для исхода "карты закончились")
+    """
+
+    __slots__ = ("stops", "open", "entries")
+
+    def __init__(self, stops, open_draws):
+        self.stops = stops
+        self.open = open_draws
+        # наборы в виде для быстрого пересчёта весов: (порядки, итог, количество карт, ((ранг, количество), ...))
+        self.entries = tuple((n, final, sum(drawn), tuple((r, k) for r, k in enumerate(drawn) if k))
+                             for drawn, (final, n) in stops.items())
+
+
+class DealerOdds:
+    """ Калькулятор распределения итогов крупье: общие деревья добора и LRU кэш распределений ограниченного размера """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        # (total, soft) -> DrawTree
+        self.trees = {}
+        # (total, soft, состав) -> распределение
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def probabilities(self, upcard_rank, counts):
+        """
+        Вероятности итогов крупье (в порядке FINALS) по его открытой карте
+        и составу оставшихся карт (без открытой карты; скрытая карта считается неизвестной)
+        """
+
+        points = RANK_POINTS[upcard_rank]
+        return self.distribution(points, points == 11, tuple(counts))
+
+    def distribution(self, total, soft, counts):
+        """ Распределение итогов крупье, начиная с руки (total, soft) при составе counts """
+
+        if total > 21:
+            return _BUST_RESULT
+        if total >= 17:
+            return _STAND_RESULTS[total]
+
+        key = (total, soft, counts)
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return result
+        self.misses += 1
+
+        result = self.evaluate(self.tree(total, soft), counts)
+        self.cache[key] = result
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return result
+
+    def tree(self, total, soft):
+        """ Дерево добора от счёта (total, soft) меньше 17, построенное из деревьев следующих счетов """
+
+        key = (total, soft)
+        tree = self.trees.get(key)
+        if tree is not None:
+            self.hits += 1
+            return tree
+        self.misses += 1
+
+        empty = (0,) * 10
+        stops = {}
+        open_draws = {empty: 1}
+        for rank, points in enumerate(RANK_POINTS):
+            new_total, new_soft = add_card(total, soft, points)
+            if new_total >= 17:
+                final = BUST if new_total > 21 else FINALS.index(new_total)
+                stops[_add(empty, rank)] = [final, 1]
+                continue
+            sub = self.tree(new_total, new_soft)
+            for drawn, (final, n) in sub.stops.items():
+                entry = stops.setdefault(_add(drawn, rank), [final, 0])
+                entry[1] += n
+            for drawn, n in sub.open.items():
+                drawn = _add(drawn, rank)
+                open_draws[drawn] = open_draws.get(drawn, 0) + n
+
+        tree = self.trees[key] = DrawTree(stops, open_draws)
+        return tree
+
+    @staticmethod
+    def evaluate(tree, counts):
+        """ Вероятности итогов дерева добора при составе counts (вытягивание без возвращения) """
+
+        remaining = sum(counts)
+        # убывающие факториалы: falling[r][k] = counts[r] * (counts[r] - 1) * ... (k множителей).
+        # Крупье добирает меньше MAX_DRAWS карт (от 2 очков до 17 - не больше 15 тузов по 1 очку)
+        falling = []
+        for count in counts:
+            row = [1.0]
+            for k in range(MAX_DRAWS):
+                row.append(row[-1] * (count - k) if count > k else 0.0)
+            falling.append(row)
+        total_falling = [1.0]
+        for k in range(MAX_DRAWS):
+            total_falling.append(total_falling[-1] * (remaining - k) if remaining > k else 0.0)
+
+        acc = [0.0] * len(FINALS)
+        for n, final, size, ranks in tree.entries:
+            if size > remaining:
+                continue
+            weight = n
+            for rank, k in ranks:
+                weight *= falling[rank][k]
+            if weight:
+                acc[final] += weight / total_falling[size]
+
+        # карты закончились раньше, чем крупье набрал 17: он вытянул весь состав в одном из "открытых" порядков
+        orderings = tree.open.get(tuple(counts))
+        if orderings:
+            arrangements = factorial(remaining)
+            for count in counts:
+                arrangements //= factorial(count)
+            acc[UNDER_17] = orderings / arrangements
+        return tuple(acc)
+
+    def hit_rate(self):
+        """ Доля запросов к кэшу, найденных в нём """
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        """ Очищает кэш и статистику """
+
+        self.trees.clear()
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def _one_hot(index):
+    """ Распределение, в котором весь вес у одного итога """
+
+    result = [0.0] * len(FINALS)
+    result[index] = 1.0
+    return tuple(result)
+
+
+_BUST_RESULT = _one_hot(BUST)
+_STAND_RESULTS = {total: _one_hot(FINALS.index(total)) for total in range(17, 22)}
@@ -0,0 +1,158 @@
+"""
+Обработка ввода по событиям pygame.
+Нажатие мыши передаётся только элементу, в прямоугольник которого оно попало.
+Элементы ищутся по сетке ячеек (пространственный индекс), которая перестраивается
+только после изменения расположения элементов, поэтому поиск не зависит от их количества
+"""
+
+import pygame
+
+
+class Handlers:
+    """ Обработчики событий одного элемента """
+
+    __slots__ = ("order", "on_click", "on_drag", "on_hover", "on_key", "on_focus")
+
+    def __init__(self, order, on_click=None, on_drag=None, on_hover=None, on_key=None, on_focus=None):
+        self.order = order
+        self.on_click = on_click
+        self.on_drag = on_drag
+        self.on_hover = on_hover
+        self.on_key = on_key
+        self.on_focus = on_focus
+
+
+class InputDispatcher:
+    """
+    Передаёт события элементам интерфейса:
+    on_click(event) - нажатие левой кнопки мыши на элементе (один раз на нажатие),
+    on_drag(event) - нажатие на элементе, затем все движения мыши до отпускания кнопки (захват мыши),
+    on_hover(state) - мышь навелась на элемент или ушла с него,
+    on_key(event) - нажатие клавиши, когда элемент в фокусе (фокус получает элемент, на который нажали),
+    on_focus(state) - элемент получил или потерял фокус.
+    Клавиши из bind_key и события из bind обрабатываются независимо от элементов
+    """
+
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        # элемент -> обработчики (элементы с большим order нарисованы выше)
+        self.widgets = {}
+        # ячейка сетки (x, y) -> элементы, прямоугольники которых её задевают
+        self.grid = {}
+        self.grid_dirty = False
+        self.key_bindings = {}
+        self.event_bindings = {}
+
+        self.captured = None
+        self.hovered = None
+        self.focused = None
+
+    def add(self, widget, on_click=None, on_drag=None, on_hover=None, on_key=None, on_focus=None):
+        """ Добавляет элемент с обработчиками его событий """
+
+        self.widgets[widget] = Handlers(len(self.widgets), on_click, on_drag, on_hover, on_key, on_focus)
+        self.grid_dirty = True
+
+    def bind_key(self, key, callback):
+        """ Вызывает callback(event) при нажатии клавиши key """
+
+        self.key_bindings[key] = callback
+
+    def bind(self, event_type, callback):
+        """ Вызывает callback(event) для всех событий типа event_type """
+
+        self.event_bindings[event_type] = callback
+
+    def invalidate(self):
+        """
+        Перестраивает сетку при следующем поиске. Вызывается после перемещения элементов
+        или изменения их размеров, в том числе после нового текста надписи, кнопки или поля ввода
+        """
+
+        self.grid_dirty = True
+
+    def rebuild(self):
+        """ Заносит каждый элемент во все ячейки сетки, которые задевает его прямоугольник """
+
+        self.grid = {}
+        for widget in self.widgets:
+            rect = widget.get_rect()
+            if not rect.width or not rect.height:
+                continue
+            for x in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+                for y in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+                    self.grid.setdefault((x, y), []).append(widget)
+        self.grid_dirty = False
+
+    def hit_test(self, pos):
+        """ Возвращает верхний элемент в точке pos или None """
+
+        if self.grid_dirty:
+            self.rebuild()
+        cell = self.grid.get((int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size), ())
+        hit = None
+        for widget in cell:
+            if widget.get_rect().collidepoint(pos) and (hit is None or
+                                                       self.widgets[widget].order > self.widgets[hit].order):
+                hit = widget
+        return hit
+
+    def set_focus(self, widget):
+        """ Передаёт фокус клавиатуры элементу (None - ни одному) """
+
+        if widget is self.focused:
+            return
+        if self.focused is not None and self.widgets[self.focused].on_focus is not None:
+            self.widgets[self.focused].on_focus(False)
+        self.focused = widget
+        if widget is not None and self.widgets[widget].on_focus is not None:
+            self.widgets[widget].on_focus(True)
+
+    def set_hover(self, widget):
+        """ Запоминает элемент под мышью и сообщает элементам о наведении """
+
+        if widget is self.hovered:
+            return
+        if self.hovered is not None and self.widgets[self.hovered].on_hover is not None:
+            self.widgets[self.hovered].on_hover(False)
+        self.hovered = widget
+        if widget is not None and self.widgets[widget].on_hover is not None:
+            self.widgets[widget].on_hover(True)
+
+    def dispatch(self, event):
+        """ Передаёт одно событие обработчикам """
+
+        if event.type in self.event_bindings:
+            self.event_bindings[event.type](event)
+
+        if event.type == pygame.KEYDOWN:
+            if event.key in self.key_bindings:
+                self.key_bindings[event.key](event)
+            elif self.focused is not None:
+                self.widgets[self.focused].on_key(event)
+            return
+
+        if event.type not in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION):
+            return
+        if self.captured is not None:
+            self.widgets[self.captured].on_drag(event)
+            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self.captured = None
+            return
+
+        widget = self.hit_test(event.pos)
+        if event.type == pygame.MOUSEMOTION:
+            self.set_hover(widget)
+            return
+        if event.type != pygame.MOUSEBUTTONDOWN or event.button != 1:
+            return
+
+        handlers = None if widget is None else self.widgets[widget]
+        self.set_focus(widget if handlers is not None and handlers.on_key is not None else None)
+        if handlers is None:
+            return
+        if handlers.on_drag is not None:
+            self.captured = widget
+            handlers.on_drag(event)
+        if handlers.on_click is not None:
+            handlers.on_click(event)
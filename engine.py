@@ -0,0 +1,231 @@
+"""
+Логика одного раунда Блэк Джек без графики.
+Модуль не импортирует pygame и может использоваться для массовых симуляций,
+тестирования и проверки выплат. update.Game является графическим представлением этого раунда
+"""
+
+import os
+import config
+import game_objects
+from messages import relative_payments_messages, not_enough_money_message, cant_bid_zero_message
+
+# состояния раунда
+BETTING = "betting"
+PLAYING = "playing"
+FINISHED = "finished"
+
+# действия игрока
+BET = "bet"
+HIT = "hit"
+STAND = "stand"
+DOUBLE = "double"
+
+# исходы раунда (ключи relative_payments_messages) и их номера в двоичных форматах
+# (history.py, ledger.py, server.py) и массивах batch.py
+OUTCOMES = tuple(relative_payments_messages)
+OUTCOME_CODES = {key: i for i, key in enumerate(OUTCOMES)}
+
+DEFAULT_BALANCE = 5000
+
+
+def save_money(money: int, path=None):
+    """ Сохраняет деньги игрока в файл """
+
+    with open(path or config.SAVE_MONEY_PATH, "w") as file:
+        file.write(str(money))
+
+
+def load_money(default=DEFAULT_BALANCE, path=None):
+    """ Загружает деньги игрока из файла. Если его не существует, функция вернёт default """
+
+    path = path or config.SAVE_MONEY_PATH
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            try:
+                return int(file.readline())
+            except ValueError:
+                return default
+    save_money(default, path)
+    return default
+
+
+def check_bid(bid: int, balance: int):
+    """ Проверяет ставку. Возвращает None, если её можно сделать, или сообщение о причине отказа """
+
+    if bid > balance:
+        return not_enough_money_message
+    if bid <= 0:
+        return cant_bid_zero_message
+
+
+class Round:
+    """
+    Конечный автомат одного раунда: ставка и раздача -> ходы игрока -> ход крупье -> расчёт.
+    Состояние меняется только через step(action)
+    """
+
+    def __init__(self, balance=DEFAULT_BALANCE, deck=None):
+        self.balance = balance
+        self.deck = game_objects.Deck() if deck is None else deck
+        self.player = game_objects.Player()
+        self.dealer = game_objects.Player()
+
+        self.state = BETTING
+        self.bid = 0
+        self.is_bid_doubled = False
+        self.game_end_state = ""
+        self.payout = 0
+        # карты в порядке раздачи и выполненные действия игрока (для истории раундов, см. history.py)
+        self.dealt = []
+        self.actions = []
+        # первая карта крупье лежит рубашкой вверх до хода крупье или расчёта раунда
+        self.hole_revealed = False
+
+    def deal_initial_cards(self):
+        """ Раздаёт две карты игроку и две крупье (первая - рубашкой вверх) после принятой ставки """
+
+        self.deck.start_round()
+        for i in range(2):
+            self.player.add_card(self.deal_card())
+        self.dealer.add_card(self.deal_card(face_up=False))
+        self.dealer.add_card(self.deal_card())
+
+    def deal_card(self, face_up=True):
+        """ Берёт карту из колоды, запоминая порядок раздачи """
+
+        card = self.deck.deal_card(face_up)
+        self.dealt.append(card)
+        return card
+
+    def reveal_hole_card(self):
+        """ Открывает закрытую карту крупье (наблюдатели колоды, например счёт карт, узнают о ней только теперь) """
+
+        if not self.hole_revealed:
+            self.hole_revealed = True
+            self.deck.reveal(self.dealer.cards[0])
+
+    def step(self, action, bid=0):
+        """
+        Выполняет действие игрока.
+        Возвращает None, если действие выполнено, или сообщение о причине отказа
+        """
+
+        if action == BET:
+            return self.place_bid(bid)
+        if self.state != PLAYING:
+            raise ValueError(f"Action {action!r} is not allowed in state {self.state!r}")
+        if action == HIT:
+            error = self.hit()
+        elif action == STAND:
+            error = self.stand()
+        elif action == DOUBLE:
+            error = self.double()
+        else:
+            raise ValueError(f"Unknown action {action!r}")
+        if error is None:
+            self.actions.append(action)
+        return error
+
+    def place_bid(self, bid: int):
+        """ Проверяет ставку и начинает раунд """
+
+        if self.state != BETTING:
+            raise ValueError(f"Action {BET!r} is not allowed in state {self.state!r}")
+        error = check_bid(bid, self.balance)
+        if error is not None:
+            return error
+        self.bid = bid
+        self.state = PLAYING
+        # карты раздаются только после ставки: до неё игрок их не видит и счёт карт их не учитывает
+        self.deal_initial_cards()
+
+    def can_hit(self):
+        """ Может ли игрок взять карту """
+
+        return self.state == PLAYING and not self.is_bid_doubled
+
+    def can_double(self):
+        """ Может ли игрок удвоить ставку """
+
+        return self.state == PLAYING and not self.is_bid_doubled and self.balance >= self.bid * 2
+
+    def hit(self):
+        """ Выдаёт игроку одну карту из колоды """
+
+        if not self.can_hit():
+            raise ValueError("Player can't take a card after doubling the bet")
+        self.player.add_card(self.deal_card())
+        if self.player.is_bust():
+            self.settle("player_busts")
+
+    def double(self):
+        """ Удваивает ставку, после чего игрок получает ровно одну карту """
+
+        if not self.can_double():
+            if self.is_bid_doubled:
+                raise ValueError("The bet has already been doubled")
+            return not_enough_money_message
+        self.is_bid_doubled = True
+        self.bid *= 2
+        self.player.add_card(self.deal_card())
+        if self.player.is_bust():
+            self.settle("player_busts")
+
+    def stand(self):
+        """ Ход крупье: берёт карты, пока у него меньше 17 очков, затем раунд рассчитывается """
+
+        self.reveal_hole_card()
+        while self.dealer.get_value() < 17:
+            self.dealer.add_card(self.deal_card())
+        if self.dealer.is_bust():
+            self.settle("dealer_busts")
+        else:
+            self.settle()
+
+    def settle(self, game_end_state=""):
+        """ Определяет исход раунда и выплату """
+
+        self.reveal_hole_card()
+        player_value = self.player.get_value()
+        dealer_value = self.dealer.get_value()
+
+        if game_end_state == "":
+            if player_value > dealer_value:
+                game_end_state = "player_wins"
+            elif player_value < dealer_value:
+                game_end_state = "dealer_wins"
+            else:
+                game_end_state = "tie"
+        if self.player.is_blackjack():
+            game_end_state = "black_jack"
+
+        self.game_end_state = game_end_state
+        self.payout = int(self.bid * relative_payments_messages[game_end_state])
+        self.balance += self.payout
+        self.state = FINISHED
+
+    def is_win(self):
+        """ Выиграл ли игрок """
+
+        return self.state == FINISHED and relative_payments_messages[self.game_end_state] > 0
+
+    def is_lose(self):
+        """ Проиграл ли игрок """
+
+        return self.state == FINISHED and relative_payments_messages[self.game_end_state] < 0
+
+    def is_tie(self):
+        """ Закончился ли раунд ничьей """
+
+        return self.state == FINISHED and relative_payments_messages[self.game_end_state] == 0
+
+
+def play_strategy(game_round, stand_on=17, double_on=()):
+    """ Доигрывает раунд после ставки: удвоение на счетах double_on, затем карты до stand_on очков """
+
+    if game_round.player.get_value() in double_on and not game_round.player.is_soft():
+        game_round.step(DOUBLE)
+    while game_round.can_hit() and game_round.player.get_value() < stand_on:
+        game_round.step(HIT)
+    if game_round.state == PLAYING:
+        game_round.step(STAND)
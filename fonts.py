@@ -0,0 +1,45 @@
+"""
+Общий для всего процесса реестр шрифтов и кэш отрисованного текста.
+Системный шрифт ищется один раз для каждого сочетания (имя, размер, bold, italic),
+а одинаковые строки не растеризуются повторно
+"""
+
+from functools import lru_cache
+import pygame
+
+# сколько отрисованных строк хранится в кэше
+TEXT_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=None)
+def get_font(name, size, bold=False, italic=False):
+    """ Возвращает шрифт, находя его в системе только при первом обращении """
+
+    return pygame.font.SysFont(name, size, bold, italic)
+
+
+def render_text(font, text, smooth, foreground, background=None):
+    """
+    Возвращает поверхность с текстом из кэша или отрисовывает её.
+    Поверхность общая для всех, кто отрисовал такой же текст, поэтому изменять её нельзя
+    """
+
+    if foreground is not None:
+        foreground = tuple(foreground)
+    if background is not None:
+        background = tuple(background)
+    return _render_text(font, text, bool(smooth), foreground, background)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _render_text(font, text, smooth, foreground, background):
+    """ Отрисовывает текст. Аргументы должны быть хэшируемыми """
+
+    return font.render(text, smooth, foreground, background)
+
+
+def clear():
+    """ Очищает реестр шрифтов и кэш текста (например, после pygame.font.quit) """
+
+    get_font.cache_clear()
+    _render_text.cache_clear()
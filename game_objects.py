@@ -1,67 +1,308 @@
 """ Классы, представляющие логику игровых объектов """
 
-import random
+from rng import default_service
 from messages import cards_values_messages, cards_suits_messages
 
 
+# карта может быть представлена числом от 0 до 51: index = (value - 2) * 4 + suit
+# (тот же порядок, в котором карты создаются в Deck)
+CARD_VALUES = tuple(value for value in range(2, 15) for suit in range(4))
+CARD_SUITS = tuple(suit for value in range(2, 15) for suit in range(4))
+# очки карты в Блэк Джек (туз - 11)
+CARD_POINTS = tuple(11 if value == 14 else min(value, 10) for value in CARD_VALUES)
+# индекс ранга в векторе состава колоды: 0-7 для карт 2-9, 8 для десяток и картинок, 9 для туза
+CARD_RANKS = tuple(points - 2 for points in CARD_POINTS)
+CARD_NAMES = tuple(f"{cards_values_messages[value]} {cards_suits_messages[suit]}"
+                   for value, suit in zip(CARD_VALUES, CARD_SUITS))
+
+
 class Card:
-    """ Представляет карту """
+    """
+    Представляет карту.
+    Все 52 карты создаются один раз при импорте модуля (см. CARDS),
+    Card(value, suit) возвращает уже существующий объект
+    """
 
-    def __init__(self, value: int, suit: int):
+    __slots__ = ("value", "suit", "index", "points", "rank")
+
+    def __new__(cls, value: int, suit: int):
         # value может быть от 2 до 14
         # suit может быть от 0 до 3
+        if not 2 <= value <= 14:
+            raise ValueError(f"Card value must be from 2 to 14, got {value!r}")
+        if not 0 <= suit <= 3:
+            raise ValueError(f"Card suit must be from 0 to 3, got {suit!r}")
+
+        return CARDS[(value - 2) * 4 + suit]
 
-        self.value = value
-        self.suit = suit
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
+
+    def __reduce__(self):
+        return Card, (self.value, self.suit)
 
     def __str__(self):
-        return f"{cards_values_messages[self.value]} {cards_suits_messages[self.suit]}"
+        return CARD_NAMES[self.index]
+
+
+def _create_card(index):
+    """ Создаёт единственный объект карты с номером index """
+
+    card = object.__new__(Card)
+    object.__setattr__(card, "value", CARD_VALUES[index])
+    object.__setattr__(card, "suit", CARD_SUITS[index])
+    object.__setattr__(card, "index", index)
+    object.__setattr__(card, "points", CARD_POINTS[index])
+    object.__setattr__(card, "rank", CARD_RANKS[index])
+    return card
+
+
+CARDS = tuple(_create_card(index) for index in range(52))
 
 
 class Deck:
     """ Представляет колоду карт """
 
-    def __init__(self):
-        self.cards = [Card(value, suit) for value in [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
-                      for suit in [0, 1, 2, 3]]
-        random.shuffle(self.cards)
+    decks = 1
+
+    def __init__(self, rng=None):
+        # rng - любой объект с методом shuffle (rng.RandomService, его bulk(), random.Random).
+        # По умолчанию - общий поток процесса rng.default_service()
+        if rng is None:
+            rng = default_service()
+        self.cards = list(CARDS)
+        rng.shuffle(self.cards)
+        # наблюдатели с методами card_dealt(card) и shuffled() (например, counting.CardCounter)
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """ Подписывает наблюдателя на раздачу карт """
+
+        self.listeners.append(listener)
+
+    def start_round(self):
+        """ Вызывается перед раундом. Колода используется только в одном раунде, поэтому ничего не делает """
+
+    def deal_card(self, face_up=True):
+        """ Выдаёт игроку одну карту из колоды. О карте рубашкой вверх наблюдатели узнают в reveal """
+
+        card = self.cards.pop()
+        if face_up and self.listeners:
+            for listener in self.listeners:
+                listener.card_dealt(card)
+        return card
+
+    def reveal(self, card):
+        """ Открывает карту, розданную рубашкой вверх """
+
+        for listener in self.listeners:
+            listener.card_dealt(card)
+
+    def remaining(self):
+        """ Количество оставшихся карт """
+
+        return len(self.cards)
+
+    def composition(self):
+        """ Состав оставшихся карт: количество карт рангов 2-9, десяток и тузов """
+
+        counts = [0] * 10
+        for card in self.cards:
+            counts[card.rank] += 1
+        return tuple(counts)
+
+
+class Shoe:
+    """
+    Башмак из нескольких колод.
+    Карты лежат в одном списке, раздача только сдвигает указатель, а перемешивание
+    происходит перед раундом, когда указатель дошёл до отрезной карты.
+    Если карты закончились посреди раунда, перемешивается только сброс прошлых раундов
+    """
+
+    def __init__(self, decks=6, penetration=0.75, rng=None):
+        if not 1 <= decks <= 8:
+            raise ValueError("A shoe must contain from 1 to 8 decks")
+        if not 0 <= penetration <= 1:
+            raise ValueError("Penetration must be from 0 to 1")
+
+        self.decks = decks
+        self.penetration = penetration
+        self.rng = default_service() if rng is None else rng
+        self.cards = list(CARDS) * decks
+        # номер карты, на котором лежит отрезная карта
+        self.cut_card = int(len(self.cards) * penetration)
+        self.position = 0
+        # номер первой карты текущего раунда: карты до него уже сброшены и могут быть перемешаны заново
+        self.round_start = 0
+        # карты текущего раунда, розданные рубашкой вверх и ещё не открытые
+        self.hidden = []
+        # сколько карт каждого ранга (см. CARD_RANKS) ещё не роздано
+        self.counts = [0] * 10
+        self.shuffles = 0
+        # наблюдатели с методами card_dealt(card) и shuffled() (например, counting.CardCounter)
+        self.listeners = []
+
+        self.shuffle()
 
-    def deal_card(self):
-        """ Выдаёт игроку одну карту из колоды """
+    def add_listener(self, listener):
+        """ Подписывает наблюдателя на раздачу и перемешивание карт """
 
-        return self.cards.pop()
+        self.listeners.append(listener)
+
+    def shuffle(self):
+        """ Собирает и перемешивает все карты башмака """
+
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        self.counts = [4 * self.decks] * 8 + [16 * self.decks, 4 * self.decks]
+        self.shuffles += 1
+        for listener in self.listeners:
+            listener.shuffled()
+
+    def start_round(self):
+        """ Перемешивает башмак перед раундом, если раздача дошла до отрезной карты """
+
+        self.hidden = []
+        if self.position >= self.cut_card:
+            self.shuffle()
+        self.round_start = self.position
+
+    def shuffle_discards(self):
+        """
+        Карты закончились посреди раунда: перемешиваются только сброшенные карты прошлых раундов.
+        Карты текущего раунда остаются на столе и не могут попасть в раздачу второй раз
+        """
+
+        table = self.cards[self.round_start:]
+        discards = self.cards[:self.round_start]
+        if not discards:
+            raise RuntimeError("The shoe ran out of cards within a single round")
+        self.rng.shuffle(discards)
+        self.cards = table + discards
+        # карты раунда теперь лежат в начале списка, за ними - перемешанный сброс
+        self.position = len(table)
+        self.round_start = 0
+        self.counts = [0] * 10
+        for card in discards:
+            self.counts[card.rank] += 1
+        self.shuffles += 1
+        for listener in self.listeners:
+            listener.shuffled()
+
+    def deal_card(self, face_up=True):
+        """ Выдаёт игроку одну карту из башмака. О карте рубашкой вверх наблюдатели узнают в reveal """
+
+        if self.position == len(self.cards):
+            self.shuffle_discards()
+        card = self.cards[self.position]
+        self.position += 1
+        self.counts[card.rank] -= 1
+        if not face_up:
+            self.hidden.append(card)
+        elif self.listeners:
+            for listener in self.listeners:
+                listener.card_dealt(card)
+        return card
+
+    def reveal(self, card):
+        """ Открывает карту, розданную рубашкой вверх """
+
+        if card in self.hidden:
+            self.hidden.remove(card)
+        for listener in self.listeners:
+            listener.card_dealt(card)
+
+    def remaining(self):
+        """ Количество оставшихся карт """
+
+        return len(self.cards) - self.position
+
+    def composition(self):
+        """ Состав оставшихся карт: количество карт рангов 2-9, десяток и тузов """
+
+        return tuple(self.counts)
+
+    def unseen(self):
+        """ Состав карт, которых игрок ещё не видел: оставшиеся в башмаке и закрытые на столе """
+
+        counts = list(self.counts)
+        for card in self.hidden:
+            counts[card.rank] += 1
+        return tuple(counts)
+
+
+def next_hand(total, soft, points):
+    """
+    Счёт руки (total, soft) после добавления карты с очками points.
+    soft означает, что один туз в руке считается за 11 очков
+    """
+
+    if points == 11 and soft:
+        points = 1
+    total += points
+    soft = soft or points == 11
+    if total > 21 and soft:
+        total -= 10
+        soft = False
+    return total, soft
+
+
+# таблица переходов для рук без перебора: HAND_TRANSITIONS[(total * 2 + soft) * 10 + rank] -> (total, soft)
+HAND_TRANSITIONS = tuple(next_hand(total, bool(soft), rank + 2)
+                         for total in range(22) for soft in (0, 1) for rank in range(10))
 
 
 class Player:
-    """ Представляет логику игрока в Блэк Джек """
+    """
+    Представляет логику игрока в Блэк Джек.
+    Счёт руки обновляется при добавлении каждой карты, поэтому все проверки выполняются за O(1)
+    """
 
     def __init__(self):
         self.cards = []
+        self.total = 0
+        self.soft = False
+        self.bust = False
+        self.blackjack = False
 
     def add_card(self, card):
         """ Добавляет одну карту """
 
         self.cards.append(card)
+        if self.bust:
+            # после перебора все тузы уже считаются за 1 очко
+            self.total += 1 if card.value == 14 else card.points
+        else:
+            self.total, self.soft = HAND_TRANSITIONS[(self.total * 2 + self.soft) * 10 + card.rank]
+            self.bust = self.total > 21
+        self.blackjack = len(self.cards) == 2 and self.total == 21
 
     def get_value(self):
-        """ Вычисляет общий счёт игрока """
+        """ Возвращает общий счёт игрока """
+
+        return self.total
+
+    def is_bust(self):
+        """ Перебор (больше 21 очка) """
+
+        return self.bust
+
+    def is_soft(self):
+        """ Считается ли туз в руке за 11 очков """
+
+        return self.soft
+
+    def is_blackjack(self):
+        """ Блэк Джек: 21 очко двумя картами """
 
-        value = sum(self.get_card_value(card) for card in self.cards)
-        num_aces = sum(1 for card in self.cards if card.value == 14)
-        while value > 21 and num_aces:
-            value -= 10
-            num_aces -= 1
-        return value
+        return self.blackjack
 
     @staticmethod
     def get_card_value(card):
         """ Вычисляет счёт одной карты игрока """
 
-        if card.value == 14:
-            return 11
-        if card.value < 11:
-            return card.value
-        return 10
+        return card.points
 
     def __str__(self):
         return ", ".join(str(card) for card in self.cards)
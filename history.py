@@ -0,0 +1,246 @@
+"""
+Двоичная история раундов и её проверка повторным розыгрышем.
+Раунд хранится компактной записью: ставка, исход, выплата, карты в порядке раздачи
+(номера карт 0-51, см. game_objects.CARDS) и действия игрока. Записи с префиксом длины
+собираются в блоки, которые можно сжимать zlib. Проверка читает файл через mmap
+и заново разыгрывает каждый раунд на колоде с той же последовательностью карт:
+
+    python history.py record 1000000 history.bin
+    python history.py replay history.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+import config
+import engine
+import game_objects
+from rng import RandomService
+from engine import OUTCOMES, OUTCOME_CODES
+
+MAGIC = b"BJH1"
+
+# блок: флаги, количество записей и длина данных блока
+BLOCK = struct.Struct("<BII")
+COMPRESSED = 1
+# запись: длина, затем ставка, исход, выплата и количество карт, затем карты и действия по одному байту
+LENGTH = struct.Struct("<H")
+HEADER = struct.Struct("<IBiB")
+
+ACTIONS = (engine.HIT, engine.STAND, engine.DOUBLE)
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+# ставка в 2 единицы, чтобы выплата 3:2 оставалась целым числом (как в simulation.py)
+BET = 2
+
+HandRecord = namedtuple("HandRecord", "bet outcome payout cards actions")
+
+
+def pack_round(game_round):
+    """ Упаковывает рассчитанный раунд engine.Round в запись с префиксом длины """
+
+    # ставка записывается до удвоения, удвоение видно по действиям
+    bet = game_round.bid // 2 if game_round.is_bid_doubled else game_round.bid
+    cards = bytes(card.index for card in game_round.dealt)
+    actions = bytes(ACTION_CODES[action] for action in game_round.actions)
+    data = HEADER.pack(bet, OUTCOME_CODES[game_round.game_end_state], game_round.payout, len(cards)) + cards + actions
+    return LENGTH.pack(len(data)) + data
+
+
+def unpack_records(data, count):
+    """ Распаковывает count записей из данных блока """
+
+    offset = 0
+    for _ in range(count):
+        length, = LENGTH.unpack_from(data, offset)
+        start = offset + LENGTH.size
+        bet, outcome, payout, cards_count = HEADER.unpack_from(data, start)
+        cards_start = start + HEADER.size
+        actions_start = cards_start + cards_count
+        offset = start + length
+        yield HandRecord(bet, OUTCOMES[outcome], payout, data[cards_start:actions_start], data[actions_start:offset])
+
+
+def blocks_end(file, size):
+    """ Смещение конца последнего целого блока (после сбоя в конце файла может остаться неполный блок) """
+
+    offset = len(MAGIC)
+    while offset + BLOCK.size <= size:
+        file.seek(offset)
+        flags, count, length = BLOCK.unpack(file.read(BLOCK.size))
+        if offset + BLOCK.size + length > size:
+            break
+        offset += BLOCK.size + length
+    return offset
+
+
+class HistoryWriter:
+    """ Дописывает раунды в файл истории блоками по block_records записей """
+
+    def __init__(self, path, compress=True, block_records=1024):
+        self.path = path
+        self.compress = compress
+        self.block_records = block_records
+        self.pending = []
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.file = open(path, "r+b" if size else "wb")
+        if size:
+            self.file.seek(0)
+            if self.file.read(len(MAGIC)) != MAGIC:
+                self.file.close()
+                raise ValueError(f"{path} is not a hand history file")
+            self.file.truncate(blocks_end(self.file, size))
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file.write(MAGIC)
+
+    def write(self, game_round):
+        """ Добавляет рассчитанный раунд """
+
+        self.pending.append(pack_round(game_round))
+        if len(self.pending) >= self.block_records:
+            self.flush()
+
+    def flush(self):
+        """ Записывает накопленные раунды одним блоком """
+
+        if not self.pending:
+            return
+        data = b"".join(self.pending)
+        flags = 0
+        if self.compress:
+            data = zlib.compress(data)
+            flags |= COMPRESSED
+        self.file.write(BLOCK.pack(flags, len(self.pending), len(data)) + data)
+        self.file.flush()
+        self.pending = []
+
+    def close(self):
+        """ Записывает оставшиеся раунды и закрывает файл """
+
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_history(path):
+    """ Читает записи истории из отображённого в память файла """
+
+    with open(path, "rb") as file:
+        if os.path.getsize(path) <= len(MAGIC):
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a hand history file")
+            offset = len(MAGIC)
+            while offset + BLOCK.size <= len(data):
+                flags, count, length = BLOCK.unpack_from(data, offset)
+                offset += BLOCK.size
+                if offset + length > len(data):
+                    return
+                block = data[offset:offset + length]
+                offset += length
+                if flags & COMPRESSED:
+                    block = zlib.decompress(block)
+                yield from unpack_records(block, count)
+
+
+class StackedDeck:
+    """ Колода, выдающая карты в заданном порядке """
+
+    def __init__(self, cards):
+        self.cards = [game_objects.CARDS[index] for index in reversed(cards)]
+
+    def start_round(self):
+        """ Колода используется только в одном раунде """
+
+    def deal_card(self, face_up=True):
+        """ Выдаёт следующую карту """
+
+        return self.cards.pop()
+
+    def reveal(self, card):
+        """ У колоды нет наблюдателей """
+
+
+def replay(record):
+    """ Разыгрывает раунд заново. Возвращает True, если исход и выплата совпали с записанными """
+
+    deck = StackedDeck(record.cards)
+    game_round = engine.Round(record.bet * 2, deck)
+    try:
+        game_round.step(engine.BET, record.bet)
+        for code in record.actions:
+            game_round.step(ACTIONS[code])
+    except (IndexError, ValueError):
+        return False
+    return (game_round.state == engine.FINISHED and not deck.cards and
+            game_round.game_end_state == record.outcome and game_round.payout == record.payout)
+
+
+def verify(path):
+    """ Проверяет все раунды файла. Возвращает количество раундов и номера несовпавших """
+
+    count = 0
+    mismatches = []
+    for count, record in enumerate(read_history(path), 1):
+        if not replay(record):
+            mismatches.append(count - 1)
+    return count, mismatches
+
+
+def record(rounds, path, seed=None, compress=True, stand_on=17, double_on=(10, 11)):
+    """ Разыгрывает rounds раундов на башмаке с простой стратегией и записывает их в историю """
+
+    shoe = game_objects.Shoe(config.SHOE_DECKS, config.SHOE_PENETRATION, RandomService(seed))
+    with HistoryWriter(path, compress) as writer:
+        for _ in range(rounds):
+            game_round = engine.Round(BET * 2, shoe)
+            game_round.step(engine.BET, BET)
+            engine.play_strategy(game_round, stand_on, double_on)
+            writer.write(game_round)
+
+
+def main():
+    """ Запись и проверка истории из командной строки """
+
+    parser = argparse.ArgumentParser(description="Record and replay binary hand histories")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="play rounds headless and record them")
+    record_parser.add_argument("rounds", type=int)
+    record_parser.add_argument("path")
+    record_parser.add_argument("--seed", type=int)
+    record_parser.add_argument("--no-compress", action="store_true")
+    replay_parser = commands.add_parser("replay", help="replay every round and verify outcomes and payouts")
+    replay_parser.add_argument("path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "record":
+        record(args.rounds, args.path, args.seed, not args.no_compress)
+        elapsed = time.perf_counter() - start
+        print(f"recorded {args.rounds} rounds in {elapsed:.2f} s, {os.path.getsize(args.path)} bytes")
+        return
+
+    count, mismatches = verify(args.path)
+    elapsed = time.perf_counter() - start
+    print(f"replayed {count} rounds in {elapsed:.2f} s ({count / elapsed if elapsed else 0:.0f} rounds/s)")
+    print(f"mismatches: {len(mismatches)}")
+    for index in mismatches[:20]:
+        print(f"  round {index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Журнал банкролла игрока вместо перезаписи money.txt после каждого раунда.
+Каждый раунд дописывается в конец двоичного журнала записью фиксированного размера
+(время, ставка, удвоение, исход, выплата) с контрольной суммой. Баланс восстанавливается
+из периодического снимка и записей журнала после него. Записи сбрасываются на диск группами
+(group commit), а политика fsync настраивается. Журнал блокируется, чтобы два запущенных
+приложения не писали в него одновременно
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+import engine
+from engine import OUTCOMES, OUTCOME_CODES
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"BJL1"
+
+# виды записей: раунд и изменение баланса без раунда (начальный баланс, перенос из money.txt)
+ROUND = 0
+DEPOSIT = 1
+
+# исход раунда хранится номером из engine.OUTCOME_CODES, у пополнения исхода нет
+NO_OUTCOME = 255
+
+# вид, время, ставка, удвоение, исход, выплата и CRC32 этих полей
+RECORD = struct.Struct("<BdI?Bq")
+CRC = struct.Struct("<I")
+RECORD_SIZE = RECORD.size + CRC.size
+
+# политики fsync: после каждой записи, после каждой группы записей, никогда (решает ОС)
+FSYNC_ALWAYS = "always"
+FSYNC_GROUP = "group"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_GROUP, FSYNC_NEVER)
+
+Record = namedtuple("Record", "kind timestamp bet doubled outcome payout")
+
+
+class LedgerLockedError(RuntimeError):
+    """ Журнал уже открыт другим процессом """
+
+
+def pack_record(record):
+    """ Упаковывает запись журнала вместе с контрольной суммой """
+
+    outcome = NO_OUTCOME if record.outcome is None else OUTCOME_CODES[record.outcome]
+    data = RECORD.pack(record.kind, record.timestamp, record.bet, record.doubled, outcome, record.payout)
+    return data + CRC.pack(zlib.crc32(data))
+
+
+def unpack_record(data):
+    """ Распаковывает запись журнала. Возвращает None, если контрольная сумма не совпадает """
+
+    body = data[:RECORD.size]
+    if CRC.unpack_from(data, RECORD.size)[0] != zlib.crc32(body):
+        return None
+    kind, timestamp, bet, doubled, outcome, payout = RECORD.unpack(body)
+    return Record(kind, timestamp, bet, doubled, None if outcome == NO_OUTCOME else OUTCOMES[outcome], payout)
+
+
+def read_records(file, offset=len(MAGIC)):
+    """
+    Читает записи журнала, начиная с offset. Возвращает пары (смещение после записи, запись)
+    и останавливается на первой неполной или повреждённой записи (незавершённая запись при сбое)
+    """
+
+    file.seek(offset)
+    while True:
+        data = file.read(RECORD_SIZE)
+        if len(data) < RECORD_SIZE:
+            return
+        record = unpack_record(data)
+        if record is None:
+            return
+        offset += RECORD_SIZE
+        yield offset, record
+
+
+def lock_file(file):
+    """ Блокирует файл для других процессов, не дожидаясь освобождения """
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        raise LedgerLockedError(f"{file.name} is used by another process") from None
+
+
+def read_snapshot(path):
+    """ Читает снимок баланса. Возвращает None, если его нет или он повреждён """
+
+    try:
+        with open(path, "r") as file:
+            snapshot = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not all(isinstance(snapshot.get(key), int) for key in ("offset", "balance", "records")):
+        return None
+    return snapshot
+
+
+def scan(file, snapshot_path):
+    """
+    Восстанавливает состояние журнала из снимка и записей после него.
+    Возвращает смещение конца целых записей, баланс, количество записей и количество записей в снимке
+    """
+
+    file.seek(0)
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{file.name} is not a bankroll ledger")
+    size = os.path.getsize(file.name)
+
+    offset, balance, records, snapshot_records = len(MAGIC), 0, 0, 0
+    snapshot = read_snapshot(snapshot_path)
+    if (snapshot is not None and snapshot["offset"] <= size and
+            (snapshot["offset"] - len(MAGIC)) % RECORD_SIZE == 0):
+        offset, balance = snapshot["offset"], snapshot["balance"]
+        records = snapshot_records = snapshot["records"]
+    for offset, record in read_records(file, offset):
+        balance += record.payout
+        records += 1
+    return offset, balance, records, snapshot_records
+
+
+def read_balance(path, default=engine.DEFAULT_BALANCE):
+    """ Баланс журнала без блокировки и записи (например, когда журнал открыт другим процессом) """
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return default
+    with open(path, "rb") as file:
+        return scan(file, path + ".snapshot")[1]
+
+
+class Ledger:
+    """ Журнал банкролла. Баланс всегда равен сумме выплат всех записей """
+
+    def __init__(self, path, fsync=FSYNC_GROUP, group_size=16, group_time=1.0, snapshot_interval=1000,
+                 default=engine.DEFAULT_BALANCE, legacy_path=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.fsync = fsync
+        self.group_size = group_size
+        self.group_time = group_time
+        self.snapshot_interval = snapshot_interval
+
+        self.balance = 0
+        # количество записей в журнале (включая ещё не записанные) и смещение конца записанной части
+        self.records = 0
+        self.offset = len(MAGIC)
+        # записи, ожидающие сброса на диск одной группой, и время добавления первой из них
+        self.pending = []
+        self.pending_since = None
+        self.snapshot_records = 0
+
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a+b")
+        try:
+            lock_file(self.file)
+        except LedgerLockedError:
+            self.file.close()
+            raise
+        if is_new:
+            self.file.write(MAGIC)
+            self.file.flush()
+            self.sync()
+            # баланс из старого файла money.txt переносится первой записью журнала
+            if legacy_path is not None and os.path.exists(legacy_path):
+                default = engine.load_money(default, legacy_path)
+            self.deposit(default)
+            self.flush()
+        else:
+            self.recover()
+
+    def recover(self):
+        """ Восстанавливает баланс из снимка и записей журнала после него, отбрасывая повреждённый конец """
+
+        self.offset, self.balance, self.records, self.snapshot_records = scan(self.file, self.snapshot_path)
+        if self.offset < os.path.getsize(self.path):
+            self.file.truncate(self.offset)
+            self.sync()
+
+    def snapshot(self):
+        """ Атомарно сохраняет снимок баланса на конец журнала """
+
+        self.flush()
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"offset": self.offset, "balance": self.balance, "records": self.records,
+                       "timestamp": time.time()}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.snapshot_records = self.records
+
+    def append(self, record):
+        """
+        Добавляет запись. Группа записей сбрасывается на диск, когда она заполнена или устарела.
+        Срок группы проверяется только здесь и в flush_if_due: между записями таймера нет,
+        поэтому тот, кто перестаёт писать (например, приложение после раунда), вызывает flush сам
+        """
+
+        if not self.pending:
+            self.pending_since = time.monotonic()
+        self.pending.append(record)
+        self.balance += record.payout
+        self.records += 1
+        if self.fsync == FSYNC_ALWAYS or len(self.pending) >= self.group_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+        if self.records - self.snapshot_records >= self.snapshot_interval:
+            self.snapshot()
+
+    def record_round(self, game_round):
+        """ Записывает рассчитанный раунд engine.Round """
+
+        self.append(Record(ROUND, time.time(), game_round.bid, game_round.is_bid_doubled,
+                           game_round.game_end_state, game_round.payout))
+
+    def deposit(self, amount):
+        """ Изменяет баланс без раунда """
+
+        self.append(Record(DEPOSIT, time.time(), 0, False, None, amount))
+
+    def flush_if_due(self):
+        """ Сбрасывает группу на диск, если первая запись в ней ждёт дольше group_time секунд """
+
+        if self.pending and time.monotonic() - self.pending_since >= self.group_time:
+            self.flush()
+
+    def flush(self):
+        """ Записывает ожидающие записи одной операцией и выполняет fsync по политике """
+
+        if not self.pending:
+            return
+        self.file.write(b"".join(pack_record(record) for record in self.pending))
+        self.file.flush()
+        self.offset += len(self.pending) * RECORD_SIZE
+        self.pending = []
+        if self.fsync != FSYNC_NEVER:
+            self.sync()
+
+    def sync(self):
+        """ Дожидается записи журнала на диск """
+
+        os.fsync(self.file.fileno())
+
+    def history(self):
+        """ Все записи журнала по порядку, включая ещё не сброшенные на диск """
+
+        self.file.flush()
+        with open(self.path, "rb") as file:
+            for _, record in read_records(file):
+                yield record
+        yield from list(self.pending)
+
+    def close(self):
+        """ Сбрасывает записи на диск и закрывает журнал (блокировка снимается) """
+
+        if self.file.closed:
+            return
+        self.flush()
+        self.sync()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,63 +4,116 @@
 Вместо использования отдельных модулей для различных частей игры,
 все классы и функции размещены в одном файле для более простой организации и реализации.
 А также это консольное приложение для максимального упрощения
-и смещения фокуса разработки на логику игры
+и смещения фокуса разработки на логику игры.
+Без аргументов игра идёт в консоли, с --games - пакетно, без ввода, по стратегии:
+
+    python logic.py --games 1000000 --stand-on 17
+    python logic.py --games 1000000 --strategy strategy.json --jsonl > games.jsonl
 """
 
+import argparse
+import json
 import random
+import sys
+import time
+
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+# очки каждого достоинства (туз считается за 11, пока рука не переберёт)
+CARD_VALUES = {value: 11 if value == 'A' else 10 if value in ('J', 'Q', 'K') else int(value) for value in VALUES}
+
+HIT = 'h'
+STAND = 's'
+
+# исходы игры (ключи как в messages.relative_payments_messages) и сообщения консольной игры
+OUTCOME_MESSAGES = {
+    "player_busts": "\nBust! You lose.",
+    "dealer_busts": "\nDealer busts! You win.",
+    "player_wins": "\nYou win!",
+    "dealer_wins": "\nDealer wins!",
+    "tie": "\nIt's a tie!",
+}
 
 
 class Card:
     def __init__(self, value, suit):
         self.value = value
         self.suit = suit
+        self.points = CARD_VALUES[value]
 
     def __str__(self):
         return f"{self.value} of {self.suit}"
 
 
+# карты не меняются, поэтому все колоды собираются из одних и тех же 52 объектов
+CARDS = [Card(value, suit) for value in VALUES for suit in SUITS]
+
+
 class Deck:
-    def __init__(self):
-        self.cards = [Card(value, suit) for value in ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-                      for suit in ['Hearts', 'Diamonds', 'Clubs', 'Spades']]
-        random.shuffle(self.cards)
+    def __init__(self, rng=random):
+        # rng - любой объект с методом randrange: модуль random, random.Random или rng.RandomService
+        self.cards = CARDS[:]
+        self.rng = rng
 
     def deal_card(self):
-        return self.cards.pop()
+        # колода перемешивается по ходу раздачи (Фишер-Йейтс): выдаётся случайная из ещё не розданных карт.
+        # Распределение то же, что у перемешивания всей колоды, но случайные числа тратятся только на розданные карты
+        cards = self.cards
+        i = self.rng.randrange(len(cards))
+        cards[i], cards[-1] = cards[-1], cards[i]
+        return cards.pop()
 
 
 class Hand:
     def __init__(self):
         self.cards = []
+        # сумма очков (тузы по 11) и количество тузов обновляются при добавлении карты
+        self.total = 0
+        self.aces = 0
 
     def add_card(self, card):
         self.cards.append(card)
+        self.total += card.points
+        if card.points == 11:
+            self.aces += 1
 
     def get_value(self):
-        value = sum(self.card_value(card) for card in self.cards)
-        num_aces = sum(1 for card in self.cards if card.value == 'A')
+        value = self.total
+        num_aces = self.aces
         while value > 21 and num_aces:
             value -= 10
             num_aces -= 1
         return value
 
+    def is_soft(self):
+        # хотя бы один туз всё ещё считается за 11
+        value = self.total
+        num_aces = self.aces
+        while value > 21 and num_aces:
+            value -= 10
+            num_aces -= 1
+        return num_aces > 0
+
     def card_value(self, card):
-        if card.value == 'A':
-            return 11
-        if card.value.isdigit():
-            return int(card.value)
-        return 10
+        return CARD_VALUES[card.value]
 
     def __str__(self):
         return ', '.join(str(card) for card in self.cards)
 
 
 class Blackjack:
-    def __init__(self):
-        self.deck = Deck()
+    def __init__(self, policy=None, rng=random, verbose=True):
+        # policy(player_hand, dealer_upcard) -> HIT или STAND; без неё решения вводятся с клавиатуры
+        self.policy = policy
+        self.verbose = verbose
+        self.deck = Deck(rng)
         self.player_hand = Hand()
         self.dealer_hand = Hand()
 
+    def say(self, *args):
+        if self.verbose:
+            print(*args)
+
     def deal_initial_cards(self):
         self.player_hand.add_card(self.deck.deal_card())
         self.dealer_hand.add_card(self.deck.deal_card())
@@ -69,54 +122,146 @@ class Blackjack:
 
     def player_turn(self):
         while True:
-            print("\nYour hand:", self.player_hand)
-            print("Total value:", self.player_hand.get_value())
+            if self.verbose:
+                print("\nYour hand:", self.player_hand)
+                print("Total value:", self.player_hand.get_value())
 
-            choice = input("Do you want to hit or stand? (h/s): ").strip().lower()
-            if choice == 'h':
+            if self.policy is None:
+                choice = input("Do you want to hit or stand? (h/s): ").strip().lower()
+            else:
+                choice = self.policy(self.player_hand, self.dealer_hand.cards[0])
+            if choice == HIT:
                 self.player_hand.add_card(self.deck.deal_card())
                 if self.player_hand.get_value() > 21:
                     return False
-            elif choice == 's':
+            elif choice == STAND:
                 return True
-            else:
+            elif self.policy is None:
                 print("Invalid choice! Please enter 'h' or 's'.")
                 continue
+            else:
+                raise ValueError(f"policy returned {choice!r}, expected {HIT!r} or {STAND!r}")
 
     def dealer_turn(self):
         while self.dealer_hand.get_value() < 17:
             self.dealer_hand.add_card(self.deck.deal_card())
-            print("Dealer hits.")
+            self.say("Dealer hits.")
 
-        print("\nDealer's hand:", self.dealer_hand)
-        print("Total value:", self.dealer_hand.get_value())
+        if self.verbose:
+            print("\nDealer's hand:", self.dealer_hand)
+            print("Total value:", self.dealer_hand.get_value())
         return self.dealer_hand.get_value() <= 21
 
     def play_game(self):
-        print("Welcome to Blackjack!")
+        self.say("Welcome to Blackjack!")
         self.deal_initial_cards()
 
         if not self.player_turn():
-            print("\nBust! You lose.")
-            return
-
-        if not self.dealer_turn():
-            print("\nDealer busts! You win.")
-            return
-
-        player_value = self.player_hand.get_value()
-        dealer_value = self.dealer_hand.get_value()
-        if player_value > dealer_value:
-            print("\nYou win!")
-        elif player_value < dealer_value:
-            print("\nDealer wins!")
+            outcome = "player_busts"
+        elif not self.dealer_turn():
+            outcome = "dealer_busts"
         else:
-            print("\nIt's a tie!")
+            player_value = self.player_hand.get_value()
+            dealer_value = self.dealer_hand.get_value()
+            if player_value > dealer_value:
+                outcome = "player_wins"
+            elif player_value < dealer_value:
+                outcome = "dealer_wins"
+            else:
+                outcome = "tie"
+        self.say(OUTCOME_MESSAGES[outcome])
+        return outcome
+
+    def result(self, outcome):
+        return {"outcome": outcome,
+                "player": self.player_hand.get_value(), "dealer": self.dealer_hand.get_value(),
+                "player_cards": [str(card) for card in self.player_hand.cards],
+                "dealer_cards": [str(card) for card in self.dealer_hand.cards]}
+
+
+def stand_on_policy(stand_on=17):
+    """ Стратегия: брать карты, пока у игрока меньше stand_on очков """
+
+    def policy(hand, upcard):
+        return HIT if hand.get_value() < stand_on else STAND
+
+    return policy
+
+
+def strategy_policy(path):
+    """
+    Стратегия из таблицы strategy.py (ключ "очки,мягкая,открытая карта крупье").
+    Удвоения в этой версии игры нет, поэтому выбирается лучшее из "stand" и "hit"
+    """
+
+    with open(path, "r") as file:
+        cells = json.load(file)
+    decisions = {}
+    for key, cell in cells.items():
+        total, soft, upcard = (int(i) for i in key.split(","))
+        decisions[(total, bool(soft), upcard)] = STAND if cell["stand"] >= cell["hit"] else HIT
+
+    def policy(hand, upcard):
+        return decisions[(hand.get_value(), hand.is_soft(), upcard.points)]
+
+    return policy
+
+
+def play_batch(games, policy, rng=random, verbose=False):
+    """ Играет games игр по стратегии policy и по одной возвращает их итоги """
+
+    for _ in range(games):
+        game = Blackjack(policy, rng, verbose)
+        yield game, game.play_game()
+
+
+def summary(counts, games, elapsed):
+    """ Сводка по сыгранным играм """
+
+    return {"games": games, "outcomes": dict(counts),
+            "win_rate": (counts["player_wins"] + counts["dealer_busts"]) / games if games else 0.0,
+            "seconds": round(elapsed, 3), "games_per_second": round(games / elapsed) if elapsed else 0}
+
+
+def run_batch(args):
+    """ Пакетная игра: JSON-строки итогов игр (--jsonl) и сводок в stdout """
+
+    # тот же поток, что у rng.RandomService(seed), но без зависимости от других модулей игры
+    rng = random.Random(None if args.seed is None else str(args.seed))
+    policy = strategy_policy(args.strategy) if args.strategy else stand_on_policy(args.stand_on)
+    out = sys.stdout
+    counts = dict.fromkeys(OUTCOME_MESSAGES, 0)
+    start = time.perf_counter()
+    games = 0
+    for game, outcome in play_batch(args.games, policy, rng, args.verbose):
+        counts[outcome] += 1
+        games += 1
+        if args.jsonl:
+            out.write(json.dumps(game.result(outcome)) + "\n")
+        if args.summary_every and games % args.summary_every == 0 and games != args.games:
+            out.write(json.dumps(summary(counts, games, time.perf_counter() - start)) + "\n")
+    out.write(json.dumps(summary(counts, games, time.perf_counter() - start)) + "\n")
 
 
 def main():
-    game = Blackjack()
-    game.play_game()
+    parser = argparse.ArgumentParser(description="Console blackjack; --games plays non-interactive batches")
+    parser.add_argument("--games", type=int, help="play this many games with a policy instead of asking for input")
+    parser.add_argument("--stand-on", type=int, default=17, help="hit until the hand reaches this value")
+    parser.add_argument("--strategy", help="strategy table from strategy.py (overrides --stand-on)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--jsonl", action="store_true", help="write every game as a JSON line")
+    parser.add_argument("--summary-every", type=int, default=0, help="write a running summary every N games")
+    parser.add_argument("--verbose", action="store_true", help="print every card and decision")
+    args = parser.parse_args()
+
+    if args.games is None:
+        game = Blackjack()
+        game.play_game()
+        return
+    try:
+        run_batch(args)
+    except BrokenPipeError:
+        pass
 
 
 if __name__ == "__main__":
@@ -5,8 +5,11 @@
 
 __author__ = "ved3v"
 
+from profiling import startup
 from base_app import App
 
+startup.mark("imports")
+
 if __name__ == "__main__":
     app = App("Black Jack")
     app.run()
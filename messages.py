@@ -101,6 +101,7 @@ your_bid_message = "Your bet: "
 start_game_message = "Start game"
 not_enough_money_message = "Not enough money to bet"
 cant_bid_zero_message = "The bet must be greater than 0"
+ledger_locked_message = "The game is already running"
 button_hit_message = "Hit"
 button_stand_message = "Stay"
 # {} = score
@@ -6,6 +6,8 @@
 __author__ = "Egor Mironov"
 
 import pygame.draw
+from collections import OrderedDict
+from fonts import get_font, render_text
 from functions import *
 
 
@@ -90,6 +92,9 @@ class Surface(Pos):
     менять их прозрачность, colorkey и отображать их на экране
     """
 
+    # сколько масштабированных копий поверхности хранится одновременно
+    scaled_cache_size = 2
+
     def __init__(self, game, pos=None, size=None, alpha=255, colorkey=None):
         self.game = game
 
@@ -101,6 +106,10 @@ class Surface(Pos):
         self.alpha = alpha
         self.colorkey = colorkey
 
+        # масштабированные копии self.surface по размеру
+        self.scaled_cache = OrderedDict()
+        self.scaled_source = None
+
         self.create_surface()
 
     def create_surface(self):
@@ -110,10 +119,48 @@ class Surface(Pos):
         self.surface.set_alpha(self.alpha)
         self.surface.set_colorkey(self.colorkey)
 
+    def get_scaled_surface(self):
+        """
+        Возвращает поверхность, масштабированную до self.size.
+        Масштабирование выполняется только при изменении размера, старые размеры вытесняются из кэша
+        """
+
+        size = (int(self.size[0]), int(self.size[1]))
+        if self.surface.get_size() == size:
+            return self.surface
+        if self.scaled_source is not self.surface:
+            self.scaled_cache.clear()
+            self.scaled_source = self.surface
+
+        scaled = self.scaled_cache.get(size)
+        if scaled is None:
+            scaled = pygame.transform.scale(self.surface, size)
+            self.scaled_cache[size] = scaled
+            while len(self.scaled_cache) > self.scaled_cache_size:
+                self.scaled_cache.popitem(last=False)
+        else:
+            self.scaled_cache.move_to_end(size)
+        return scaled
+
+    def get_rect(self):
+        """ Прямоугольник, который занимает объект на экране """
+
+        return pygame.Rect(self.pos, self.size)
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении внешнего вида объекта """
+
+        return self.surface, self.alpha
+
+    def draw(self):
+        """ Рисует поверхность на экране """
+
+        self.game.app.DISPLAY.blit(self.surface, self.pos)
+
     def update(self):
         """ Отображает поверхность """
 
-        self.game.app.DISPLAY.blit(self.surface, self.pos)
+        self.draw()
 
 
 class Label(Pos):
@@ -133,13 +180,28 @@ class Label(Pos):
         self.foreground = foreground
         self.background = background
 
-        self.font = pygame.font.SysFont(font_name, font_size, bold, italic)
+        self.font = get_font(font_name, font_size, bold, italic)
         self.update_text(self.text, self.smooth, self.foreground, self.background)
 
+    def get_rect(self):
+        """ Прямоугольник, который занимает надпись на экране """
+
+        return pygame.Rect(self.pos, self.size)
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении внешнего вида надписи """
+
+        return self.surface
+
+    def draw(self):
+        """ Рисует надпись на экране """
+
+        self.game.app.DISPLAY.blit(self.surface, self.pos)
+
     def update(self):
         """ Отображает поверхность надписи на экране """
 
-        self.game.app.DISPLAY.blit(self.surface, self.pos)
+        self.draw()
 
     def update_text(self, text, smooth=None, foreground=None, background=None):
         """ Обновляет значения text, smooth, foreground и background надписи и пересоздаёт её поверхность """
@@ -151,7 +213,7 @@ class Label(Pos):
             self.foreground = foreground
         if background:
             self.background = background
-        self.surface = self.font.render(self.text, self.smooth, self.foreground, self.background)
+        self.surface = render_text(self.font, self.text, self.smooth, self.foreground, self.background)
         self.size = list(self.surface.get_size())
 
     def center_x(self, y=0):
@@ -209,28 +271,13 @@ class Button(Label):
                  smooth=True, foreground=(200, 200, 200), background=None):
         super().__init__(game, text, pos, font_name, font_size, bold, italic, smooth, foreground, background)
 
-        self.counter = 0
-        self.counter_max = 50
-
-    def clicked(self, mouse_buttons, mouse_position):
-        """ Проверяет, нажата ли кнопка """
-
-        x1 = mouse_position[0]
-        x2 = self.pos[0]
-        w2 = self.size[0]
-        y1 = mouse_position[1]
-        y2 = self.pos[1]
-        h2 = self.size[1]
-        if self.counter > 0:
-            self.counter -= 1
-        if mouse_buttons[0] and touched(x1, 1, x2, w2, y1, 1, y2, h2) and self.counter <= 0:
-            self.counter = self.counter_max
-            return True
-        return False
-
 
 class Text(Label):
-    """ Графический элемент интерфейса для отображения многострочного текста """
+    """
+    Графический элемент интерфейса для отображения многострочного текста.
+    Все строки один раз рисуются на одну высокую поверхность документа, а на экран выводится
+    только её видимая часть, поэтому прокрутка не зависит от длины текста
+    """
 
     def __init__(self, game, text="", pos=None, font_name="Segoe UI", font_size=60, bold=False, italic=False,
                  smooth=True, foreground=(200, 200, 200), background=None, line_height=None):
@@ -243,42 +290,97 @@ class Text(Label):
 
         self.strings = self.text.split("\n")
         self.strings_count = len(self.strings)
-        self.strings = self.text.split("\n")
-        self.strings_count = len(self.strings)
-        self.surface_list = [self.font.render(i, self.smooth, self.foreground, self.background) for i in self.strings]
-        self.pos_list = [[self.pos[0], self.pos[1] + i * self.line_height] for i in range(self.strings_count)]
+        self.surface_list = [render_text(self.font, i, self.smooth, self.foreground, self.background)
+                             for i in self.strings]
         self.size_list = [self.surface_list[i].get_size() for i in range(self.strings_count)]
 
         self.size = [max([self.surface_list[i].get_size()[0] for i in range(self.strings_count)]),
                      self.strings_count * self.line_height]
 
+        # документы со строками по левому краю и по центру: полосы (tiles) по tile_height пикселей
+        self.tile_height = 256
+        self.documents = {}
+        self.document = None
+        self.document_size = [self.size[0], max(i * self.line_height + self.size_list[i][1]
+                                                for i in range(self.strings_count))]
+        self.document_pos = [0, 0]
+        self.place(self.pos[1], self.pos[0])
+
+    def get_document(self, centered):
+        """ Возвращает полосы документа, отрисовывая их при первом обращении """
+
+        if centered not in self.documents:
+            max_height = max(size[1] for size in self.size_list)
+            tiles = []
+            for top in range(0, self.document_size[1], self.tile_height):
+                tile = pygame.Surface((self.document_size[0], min(self.tile_height, self.document_size[1] - top)),
+                                      pygame.SRCALPHA)
+                first = max(0, (top - max_height) // self.line_height)
+                last = min(self.strings_count, (top + self.tile_height) // self.line_height + 1)
+                for i in range(first, last):
+                    y = i * self.line_height - top
+                    if -self.size_list[i][1] < y < tile.get_height():
+                        x = (self.size[0] - self.size_list[i][0]) // 2 if centered else 0
+                        # строки могут перекрываться, если line_height меньше высоты строки
+                        tile.blit(self.surface_list[i], (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+                # полосы в основном прозрачные, RLE ускоряет их вывод
+                tile.set_alpha(255, pygame.RLEACCEL)
+                tiles.append(tile)
+            self.documents[centered] = tuple(tiles)
+        return self.documents[centered]
+
+    def place(self, y, x=None):
+        """ Размещает документ на высоте y: строки по центру экрана или от левого края x """
+
+        if x is None:
+            self.document = self.get_document(True)
+            self.document_pos = [(self.game.app.WIDTH - self.size[0]) / 2, y]
+        else:
+            self.document = self.get_document(False)
+            self.document_pos = [x, y]
+
     def percent_y(self, percent=0, x=None):
         """ Размещает элемент на данном проценте от высоты экрана """
 
         one_percent = self.game.app.HEIGHT / 100
-        if x is None:
-            self.pos_list = [
-                [(self.game.app.WIDTH - self.size_list[i][0]) / 2,
-                 percent * one_percent + i * self.line_height] for i in range(self.strings_count)
-            ]
-        else:
-            self.pos_list = [[x, percent * one_percent + i * self.line_height] for i in range(self.strings_count)]
+        self.place(percent * one_percent, x)
         return self
 
     def update_y(self, y, x=None):
-        """ Обновляет позицию элемента на данный процент от высоты экрана """
+        """ Обновляет позицию элемента по вертикали. Стоимость не зависит от количества строк """
 
         self.pos[1] = y
-        if x is None:
-            self.pos_list = [[(self.game.app.WIDTH - self.size_list[i][0]) / 2, y + i * self.line_height]
-                             for i in range(self.strings_count)]
-        else:
-            self.pos_list = [[x, y + i * self.line_height] for i in range(self.strings_count)]
+        self.place(y, x)
+
+    def get_rect(self):
+        """ Прямоугольник документа со всеми строками текста """
+
+        return pygame.Rect(self.document_pos, self.document_size)
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении внешнего вида текста """
+
+        return self.document, tuple(self.document_pos)
+
+    def draw(self):
+        """ Выводит на экран только видимые полосы документа """
+
+        display = self.game.app.DISPLAY
+        rect = self.get_rect()
+        visible = rect.clip(display.get_clip())
+        if not visible.width or not visible.height:
+            return
+        first = (visible.top - rect.top) // self.tile_height
+        last = (visible.bottom - 1 - rect.top) // self.tile_height
+        for i in range(first, last + 1):
+            tile_rect = pygame.Rect(rect.left, rect.top + i * self.tile_height, *self.document[i].get_size())
+            area = tile_rect.clip(visible)
+            display.blit(self.document[i], area, area.move(-tile_rect.x, -tile_rect.y))
 
     def update(self):
         """ Отображает объект """
 
-        [self.game.app.DISPLAY.blit(self.surface_list[i], self.pos_list[i]) for i in range(self.strings_count)]
+        self.draw()
 
 
 class Entry(Button):
@@ -313,29 +415,23 @@ class Entry(Button):
                 self.text += key
         return self.update_text(self.text)
 
-    def clicked(self, mouse_buttons, mouse_position):
-        """ Проверяет нажат ли элемент """
-
-        x1 = mouse_position[0]
-        x2 = self.pos[0]
-        w2 = self.size[0]
-        y1 = mouse_position[1]
-        y2 = self.pos[1]
-        h2 = self.size[1]
-        if touched(x1, 1, x2, w2, y1, 1, y2, h2):
-            self.is_focused = True
-        else:
-            self.is_focused = False
-        if mouse_buttons[0]:
-            if not self.is_selected and self.is_focused:
-                self.is_selected = True
-                return True
-            if not self.is_focused:
-                self.is_selected = False
-        return False
+    def set_focused(self, state):
+        """ Подсвечивает поле ввода, когда на него наведена мышь """
 
-    def update(self):
-        """ Отображает объект """
+        self.is_focused = state
+
+    def set_selected(self, state):
+        """ Выбирает поле ввода для ввода с клавиатуры """
+
+        self.is_selected = state
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении внешнего вида поля ввода """
+
+        return self.surface, self.is_selected or self.is_focused
+
+    def draw(self):
+        """ Рисует поле ввода и его рамку на экране """
 
         self.game.app.DISPLAY.blit(self.surface, self.pos)
 
@@ -344,32 +440,111 @@ class Entry(Button):
             return
         pygame.draw.rect(self.game.app.DISPLAY, self.foreground, pygame.Rect(self.pos, self.size), 1)
 
+    def update(self):
+        """ Отображает объект """
+
+        self.draw()
+
 
 class Card(Surface):
     """ Графическое представление карты """
 
-    def __init__(self, game, image, image_pos=None, pos=None, size=None, colorkey=(0, 0, 0),
-                 stop_show_percent=70, stop_show_coef=25):
+    def __init__(self, game, sprite, pos=None, size=None, stop_show_percent=70, stop_show_coef=25):
         self.game = game
-        self.image = image
-        if image_pos is None:
-            self.image_pos = [0, 0]
-        else:
-            self.image_pos = image_pos
+        # спрайт общий для всех карт с таким значением и мастью (см. card_atlas)
+        self.sprite = sprite
 
-        super().__init__(game, size=size, pos=pos, colorkey=colorkey)
-        self.surface.blit(self.image, self.image_pos)
+        super().__init__(game, size=size, pos=pos)
 
         # анимации появления
         self.stop_show_percent = stop_show_percent
         self.stop_show_coef = stop_show_coef
 
+    def create_surface(self):
+        """ Использует спрайт из атласа вместо создания собственной поверхности """
+
+        self.surface = self.sprite
+
+    def next_y(self):
+        """ Позиция карты по вертикали после следующего шага анимации появления """
+
+        if self.pos[1] < percent_y(self.game, self.stop_show_percent):
+            return self.pos[1] + (percent_y(self.game, self.stop_show_percent + 1) - self.pos[1]) // self.stop_show_coef
+        return percent_y(self.game, self.stop_show_percent)
+
+    def move(self):
+        """ Один шаг анимации появления карты """
+
+        self.pos[1] = self.next_y()
+
+    def is_moving(self):
+        """ Проверяет, сдвинется ли карта на следующем шаге анимации появления """
+
+        return self.next_y() != self.pos[1]
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении внешнего вида карты """
+
+        return self.sprite
+
+    def draw(self):
+        """ Рисует карту на экране """
+
+        self.game.app.DISPLAY.blit(self.get_scaled_surface(), self.pos)
+
     def update(self):
         """ Отображает объект """
 
-        if self.pos[1] < percent_y(self.game, self.stop_show_percent):
-            self.pos[1] += (percent_y(self.game, self.stop_show_percent + 1) - self.pos[1]) // self.stop_show_coef
-        else:
-            self.pos[1] = percent_y(self.game, self.stop_show_percent)
+        self.move()
+        self.draw()
+
+
+class PerformanceOverlay(Pos):
+    """ Окно с замерами времени кадров (profiling.FrameStats) поверх игры """
+
+    def __init__(self, game, stats, pos=None, font_name="Consolas", font_size=22, refresh_time=0.5):
+        self.game = game
+
+        super().__init__(pos)
+        if pos is None:
+            self.pos = [10, 10]
+        self.stats = stats
+        self.refresh_time = refresh_time
+        self.last_refresh = None
+        self.visible = False
+
+        self.labels = [Label(game, text=" ", font_name=font_name, font_size=font_size,
+                             foreground=(0, 255, 0), background=(0, 0, 0)) for _ in stats.report()]
+
+    def refresh(self, now):
+        """ Обновляет текст не чаще, чем раз в refresh_time секунд """
+
+        if self.last_refresh is not None and now - self.last_refresh < self.refresh_time:
+            return
+        self.last_refresh = now
+        y = self.pos[1]
+        for label, line in zip(self.labels, self.stats.report()):
+            label.update_text(line)
+            label.pos = [self.pos[0], y]
+            y += label.size[1]
+
+    def get_rect(self):
+        """ Прямоугольник, в который помещаются все строки """
+
+        return self.labels[0].get_rect().unionall([label.get_rect() for label in self.labels[1:]])
+
+    def get_render_key(self):
+        """ Значение, которое меняется при каждом изменении текста """
+
+        return tuple(label.surface for label in self.labels)
+
+    def draw(self):
+        """ Рисует все строки на экране """
+
+        for label in self.labels:
+            label.draw()
+
+    def update(self):
+        """ Отображает объект """
 
-        self.game.app.DISPLAY.blit(pygame.transform.scale(self.surface, self.size), self.pos)
+        self.draw()
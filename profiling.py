@@ -0,0 +1,139 @@
+"""
+Замеры времени запуска приложения и времени кадров.
+Модуль нужно импортировать первым (см. main.py): время запуска отсчитывается от его импорта
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """ Время каждой фазы запуска и загрузки ресурсов """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        # последовательные фазы запуска: (название, секунды)
+        self.phases = []
+        # отложенные загрузки ресурсов и сцен, которые могут произойти и после первого кадра
+        self.loads = []
+
+    def mark(self, name):
+        """ Завершает фазу запуска с названием name """
+
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @contextmanager
+    def measure(self, name):
+        """ Замеряет время загрузки ресурса или создания сцены """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.loads.append((name, time.perf_counter() - start, start - self.start))
+
+    def report(self):
+        """ Возвращает отчёт в виде текста """
+
+        lines = ["startup phases:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<24} {seconds * 1000:9.1f} ms")
+        lines.append(f"  {'total':<24} {(self.last - self.start) * 1000:9.1f} ms")
+        if self.loads:
+            lines.append("deferred loads:")
+            for name, seconds, at in self.loads:
+                lines.append(f"  {name:<24} {seconds * 1000:9.1f} ms  (at {at * 1000:.1f} ms)")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """ Выводит отчёт в файл path или в stderr """
+
+        if path is None:
+            print(self.report(), file=sys.stderr)
+            return
+        with open(path, "w") as file:
+            file.write(self.report() + "\n")
+
+
+startup = StartupProfile()
+
+
+class FrameStats:
+    """
+    Время кадров по частям главного цикла в кольцевом буфере:
+    обработка событий, логика игры, отрисовка и вывод на экран (display.update и CLOCK.tick)
+    """
+
+    SECTIONS = ("events", "logic", "draw", "display", "frame")
+
+    def __init__(self, size=1000, max_fps=60):
+        self.size = size
+        self.budget = 1 / max_fps
+        self.samples = {section: [0.0] * size for section in self.SECTIONS}
+        self.index = 0
+        self.count = 0
+        self.frames = 0
+        self.dropped = 0
+
+    def add(self, events, logic, draw, display, fps=None):
+        """
+        Добавляет замеры одного кадра (в секундах).
+        fps - частота кадров, действовавшая в этом кадре (например, сниженная без фокуса окна).
+        Без неё или при 0 (частота не ограничена) кадры сравниваются с бюджетом max_fps
+        """
+
+        frame = events + logic + draw + display
+        for section, value in zip(self.SECTIONS, (events, logic, draw, display, frame)):
+            self.samples[section][self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.frames += 1
+        # кадр пропущен, если он занял больше полутора бюджетов кадра
+        budget = 1 / fps if fps else self.budget
+        if frame > budget * 1.5:
+            self.dropped += 1
+
+    def values(self, section):
+        """ Замеры части кадра в порядке их добавления """
+
+        samples = self.samples[section]
+        if self.count < self.size:
+            return samples[:self.count]
+        return samples[self.index:] + samples[:self.index]
+
+    def percentiles(self, section, percents=(50, 95, 99)):
+        """ Перцентили времени части кадра (в секундах) """
+
+        values = sorted(self.values(section))
+        if not values:
+            return tuple(0.0 for _ in percents)
+        return tuple(values[min(len(values) - 1, int(len(values) * percent / 100))] for percent in percents)
+
+    def fps(self):
+        """ Средняя частота кадров по буферу """
+
+        total = sum(self.values("frame"))
+        return self.count / total if total else 0.0
+
+    def report(self):
+        """ Строки отчёта: FPS, пропущенные кадры и p50/p95/p99 каждой части кадра в миллисекундах """
+
+        lines = [f"FPS {self.fps():.1f}  dropped {self.dropped}/{self.frames}"]
+        for section in self.SECTIONS:
+            p50, p95, p99 = (value * 1000 for value in self.percentiles(section))
+            lines.append(f"{section:<8} {p50:6.2f} {p95:6.2f} {p99:6.2f} ms")
+        return lines
+
+    def dump_csv(self, path):
+        """ Сохраняет замеры из буфера в CSV файл (в миллисекундах) """
+
+        columns = [self.values(section) for section in self.SECTIONS]
+        first = self.frames - self.count
+        with open(path, "w") as file:
+            file.write("frame," + ",".join(self.SECTIONS) + "\n")
+            for i, row in enumerate(zip(*columns)):
+                file.write(f"{first + i}," + ",".join(f"{value * 1000:.3f}" for value in row) + "\n")
@@ -0,0 +1,99 @@
+"""
+Отрисовка только изменившихся областей экрана (dirty rectangles).
+Каждый объект сообщает свой прямоугольник (get_rect) и ключ внешнего вида (get_render_key).
+Если прямоугольник или ключ изменились с прошлого кадра, старая и новая области
+восстанавливаются из фона, в них заново рисуются все задевающие их объекты,
+и на экран выводятся только эти области
+"""
+
+import pygame
+
+
+class DirtyRenderer:
+    """ Перерисовывает только изменившиеся области экрана """
+
+    def __init__(self, display, background=None):
+        self.display = display
+        self.background = background
+        # id объекта -> (объект, прямоугольник, ключ внешнего вида) на прошлом кадре.
+        # Ссылки на объекты и поверхности в ключах не дают переиспользовать их id
+        self.previous = {}
+        self.full_redraw = True
+
+    def set_background(self, background):
+        """ Меняет фон и перерисовывает весь экран на следующем кадре """
+
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """ Перерисовывает весь экран на следующем кадре (например, после смены фазы игры) """
+
+        self.full_redraw = True
+
+    def render(self, objects):
+        """ Рисует кадр. Возвращает список изменившихся прямоугольников для pygame.display.update """
+
+        screen = self.display.get_rect()
+        current = {}
+        rects = []
+        dirty = []
+        for obj in objects:
+            rect = obj.get_rect().inflate(2, 2)
+            key = obj.get_render_key()
+            rects.append(rect)
+            state = self.previous.get(id(obj))
+            if state is None:
+                dirty.append(rect)
+            elif state[1] != rect or state[2] != key:
+                dirty.append(state[1])
+                dirty.append(rect)
+            current[id(obj)] = (obj, rect, key)
+        for obj_id, state in self.previous.items():
+            if obj_id not in current:
+                dirty.append(state[1])
+        self.previous = current
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.draw_background(screen)
+            for obj in objects:
+                obj.draw()
+            return [screen]
+
+        dirty = merge_rects(rect.clip(screen) for rect in dirty)
+        for area in dirty:
+            self.display.set_clip(area)
+            self.draw_background(area)
+            for obj, rect in zip(objects, rects):
+                if area.colliderect(rect):
+                    obj.draw()
+        self.display.set_clip(None)
+        return dirty
+
+    def draw_background(self, area):
+        """ Восстанавливает фон в области area """
+
+        if self.background is None:
+            self.display.fill((0, 0, 0), area)
+        else:
+            self.display.blit(self.background, area, area)
+
+
+def merge_rects(rects):
+    """ Объединяет пересекающиеся прямоугольники, чтобы каждая область перерисовывалась один раз """
+
+    merged = []
+    for rect in rects:
+        if not rect.width or not rect.height:
+            continue
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
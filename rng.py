@@ -0,0 +1,136 @@
+"""
+Сервис случайных чисел для перемешивания колод и башмаков.
+RandomService создаётся с явным зерном (или случайным, которое можно прочитать и сохранить),
+поэтому раунды воспроизводятся бит в бит. split(key) выдаёт независимый дочерний поток
+для потока выполнения или процесса: зерно потомка - путь ключей от корня, у каждого потока
+свой генератор, и общей блокировки между ними нет. bulk() перемешивает карты
+готовыми перестановками, которые NumPy генерирует пачками (numpy нужен только для него и numpy())
+"""
+
+import random
+import config
+
+# перестановок в одной пачке bulk()
+BULK_BATCH = 1024
+# начало автоматических ключей split() в пути потока
+AUTO_PREFIX = "#"
+
+
+class RandomService:
+    """
+    Поток случайных чисел с зерном seed и путём ключей path от корневого потока.
+    Методы shuffle, randrange и random - те же, что у random.Random (сам генератор - атрибут generator),
+    поэтому сервис передаётся в game_objects.Deck/Shoe и logic.Deck вместо модуля random
+    """
+
+    def __init__(self, seed=None, path=()):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.path = tuple(path)
+        # строковое зерно хэшируется целиком, поэтому потоки с разными путями независимы
+        # (тот же способ, которым simulation.py раньше делил зерно между частями)
+        self.generator = random.Random(":".join(str(i) for i in (seed,) + self.path))
+        self.shuffle = self.generator.shuffle
+        self.randrange = self.generator.randrange
+        self.random = self.generator.random
+        self.children = 0
+        self._numpy = None
+
+    def split(self, key=None):
+        """
+        Независимый дочерний поток с ключом key (неотрицательное целое).
+        Без ключа - следующий по счёту автоматический поток; автоматические ключи
+        (AUTO_PREFIX и номер) не пересекаются с явными, поэтому split() и split(0) - разные потоки
+        """
+
+        if key is None:
+            key = f"{AUTO_PREFIX}{self.children}"
+            self.children += 1
+        elif not isinstance(key, int) or key < 0:
+            raise ValueError(f"Stream key must be a non-negative integer, got {key!r}")
+        return RandomService(self.seed, self.path + (key,))
+
+    def spawn(self, n):
+        """ n независимых дочерних потоков, например по одному на процесс """
+
+        return [self.split() for _ in range(n)]
+
+    def numpy(self):
+        """ Генератор NumPy этого потока (numpy.random.SeedSequence с тем же зерном и путём) """
+
+        if self._numpy is None:
+            import numpy as np
+            self._numpy = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=spawn_key(self.path)))
+        return self._numpy
+
+    def permutations(self, n, size=52):
+        """ Массив (n, size) из n независимых случайных перестановок чисел 0..size-1 """
+
+        return self.numpy().random((n, size)).argsort(axis=1)
+
+    def bulk(self, batch=BULK_BATCH):
+        """ Перемешивание готовыми перестановками, генерируемыми пачками по batch штук """
+
+        return BulkShuffler(self, batch)
+
+    def __repr__(self):
+        return f"RandomService(seed={self.seed}, path={self.path})"
+
+
+def spawn_key(path):
+    """ Путь потока в виде spawn_key для numpy.random.SeedSequence: явные ключи - чётные числа, автоматические - нечётные """
+
+    return tuple(key * 2 if isinstance(key, int) else int(key[len(AUTO_PREFIX):]) * 2 + 1 for key in path)
+
+
+class BulkShuffler:
+    """
+    Объект с методом shuffle, который переставляет список по следующей заранее
+    сгенерированной перестановке. Для колоды из 52 карт это в несколько раз быстрее random.shuffle
+    """
+
+    def __init__(self, service, batch=BULK_BATCH):
+        self.service = service
+        self.batch = batch
+        # длина списка -> (перестановки пачки, номер следующей)
+        self.buffers = {}
+
+    def shuffle(self, items):
+        """ Перемешивает список на месте """
+
+        size = len(items)
+        permutations, index = self.buffers.get(size, (None, self.batch))
+        if index == self.batch:
+            permutations, index = self.service.permutations(self.batch, size).tolist(), 0
+        self.buffers[size] = (permutations, index + 1)
+        items[:] = [items[i] for i in permutations[index]]
+
+
+_default = None
+
+
+def default_service():
+    """ Общий поток процесса для колод без явного генератора (зерно из config.RNG_SEED) """
+
+    global _default
+    if _default is None:
+        _default = RandomService(config.RNG_SEED)
+    return _default
+
+
+def set_default_service(service):
+    """ Заменяет общий поток процесса (например, для воспроизведения раундов по зерну из отчёта) """
+
+    global _default
+    _default = service
+
+
+def as_generator(rng=None):
+    """ Генератор NumPy для пакетных симуляций: из RandomService, готового генератора или общего потока """
+
+    if rng is None:
+        return default_service().numpy()
+    if isinstance(rng, RandomService):
+        return rng.numpy()
+    return rng
@@ -0,0 +1,252 @@
+"""
+Сервер игры на asyncio и генератор нагрузки для него.
+Каждое соединение - отдельный стол со своим башмаком и балансом, раунды играются
+на engine.Round (правила game_objects и выплаты relative_payments_messages).
+Протокол двоичный: запрос - 5 байт (команда и аргумент), ответ - длина и состояние стола:
+
+    python server.py serve --port 5050
+    python server.py load --players 1000 --duration 10
+"""
+
+import argparse
+import asyncio
+import struct
+import time
+import config
+import engine
+import game_objects
+from engine import OUTCOMES, OUTCOME_CODES
+from rng import RandomService
+
+# запрос: команда и аргумент (ставка для BET)
+REQUEST = struct.Struct("<BI")
+# ответ: длина, затем статус, состояние раунда, исход, очки игрока, выплата и баланс,
+# затем количество и номера карт игрока и крупье (см. game_objects.CARDS)
+LENGTH = struct.Struct("<H")
+RESPONSE = struct.Struct("<BBBBiq")
+
+# команды
+BET = 0
+HIT = 1
+STAND = 2
+DOUBLE = 3
+STATE = 4
+ACTIONS = {HIT: engine.HIT, STAND: engine.STAND, DOUBLE: engine.DOUBLE}
+
+# статусы ответа: выполнено, отказано по правилам (например, не хватает денег), недопустимая команда
+OK = 0
+REFUSED = 1
+ERROR = 2
+
+STATES = (engine.BETTING, engine.PLAYING, engine.FINISHED)
+STATE_CODES = {state: i for i, state in enumerate(STATES)}
+NO_OUTCOME = 255
+# закрытая карта крупье
+HIDDEN_CARD = 255
+
+
+class Table:
+    """ Стол одного игрока: башмак, баланс и текущий раунд """
+
+    def __init__(self, balance=engine.DEFAULT_BALANCE, rng=None):
+        self.shoe = game_objects.Shoe(config.SHOE_DECKS, config.SHOE_PENETRATION, rng)
+        self.balance = balance
+        self.round = None
+
+    def handle(self, command, argument=0):
+        """ Выполняет команду и возвращает статус ответа """
+
+        if command == STATE:
+            return OK
+        if command == BET:
+            if self.round is not None and self.round.state != engine.FINISHED:
+                return ERROR
+            # ставка проверяется до создания раунда, чтобы отказ не сжигал карты башмака
+            if engine.check_bid(argument, self.balance) is not None:
+                return REFUSED
+            game_round = engine.Round(self.balance, self.shoe)
+            game_round.step(engine.BET, argument)
+            self.round = game_round
+            return OK
+        if command not in ACTIONS or self.round is None:
+            return ERROR
+        try:
+            error = self.round.step(ACTIONS[command])
+        except ValueError:
+            return ERROR
+        if error is not None:
+            return REFUSED
+        if self.round.state == engine.FINISHED:
+            self.balance = self.round.balance
+        return OK
+
+    def encode(self, status):
+        """ Ответ на команду: статус и состояние стола с префиксом длины """
+
+        game_round = self.round
+        if game_round is None:
+            data = RESPONSE.pack(status, STATE_CODES[engine.BETTING], NO_OUTCOME, 0, 0, self.balance) + b"\0\0"
+            return LENGTH.pack(len(data)) + data
+
+        finished = game_round.state == engine.FINISHED
+        player = bytes(card.index for card in game_round.player.cards)
+        dealer = bytes(card.index for card in game_round.dealer.cards)
+        if not finished:
+            dealer = bytes((HIDDEN_CARD,)) + dealer[1:]
+        data = (RESPONSE.pack(status, STATE_CODES[game_round.state],
+                              OUTCOME_CODES[game_round.game_end_state] if finished else NO_OUTCOME,
+                              game_round.player.get_value(), game_round.payout, self.balance) +
+                bytes((len(player),)) + player + bytes((len(dealer),)) + dealer)
+        return LENGTH.pack(len(data)) + data
+
+
+def decode(data):
+    """ Разбирает ответ сервера (без префикса длины) в словарь """
+
+    status, state, outcome, total, payout, balance = RESPONSE.unpack_from(data)
+    offset = RESPONSE.size
+    player = data[offset + 1:offset + 1 + data[offset]]
+    offset += 1 + data[offset]
+    dealer = data[offset + 1:offset + 1 + data[offset]]
+    return {"status": status, "state": STATES[state], "outcome": None if outcome == NO_OUTCOME else OUTCOMES[outcome],
+            "total": total, "payout": payout, "balance": balance, "player": player, "dealer": dealer}
+
+
+class GameServer:
+    """ Сервер: по столу на соединение, у каждого стола свой независимый поток случайных чисел """
+
+    def __init__(self, seed=None):
+        self.random = RandomService(seed)
+        self.tables = 0
+        self.requests = 0
+
+    async def handle_client(self, reader, writer):
+        """ Обслуживает одно соединение, пока клиент его не закроет """
+
+        table = Table(rng=self.random.split())
+        self.tables += 1
+        try:
+            while True:
+                command, argument = REQUEST.unpack(await reader.readexactly(REQUEST.size))
+                writer.write(table.encode(table.handle(command, argument)))
+                self.requests += 1
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.tables -= 1
+            writer.close()
+
+    async def serve(self, host, port):
+        """ Принимает соединения до остановки процесса """
+
+        server = await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+        print(f"serving on {host}:{port}, seed {self.random.seed}")
+        async with server:
+            await server.serve_forever()
+
+
+class Client:
+    """ Соединение с сервером """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port):
+        """ Открывает соединение """
+
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, command, argument=0):
+        """ Отправляет команду и возвращает разобранный ответ """
+
+        self.writer.write(REQUEST.pack(command, argument))
+        length, = LENGTH.unpack(await self.reader.readexactly(LENGTH.size))
+        return decode(await self.reader.readexactly(length))
+
+    def close(self):
+        """ Закрывает соединение """
+
+        self.writer.close()
+
+
+async def simulated_player(host, port, deadline, latencies, results, bet=10, stand_on=17):
+    """ Играет раунды до deadline, записывая время каждого запроса. Без денег садится за новый стол """
+
+    client = await Client.connect(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.request(BET, bet)
+            latencies.append(time.perf_counter() - start)
+            if response["status"] == REFUSED:
+                client.close()
+                client = await Client.connect(host, port)
+                continue
+            while response["state"] == engine.PLAYING:
+                command = HIT if response["total"] < stand_on else STAND
+                start = time.perf_counter()
+                response = await client.request(command)
+                latencies.append(time.perf_counter() - start)
+            results[response["outcome"]] = results.get(response["outcome"], 0) + 1
+    finally:
+        client.close()
+
+
+async def load(host, port, players=100, duration=10.0, bet=10, stand_on=17):
+    """ Запускает players игроков на duration секунд и возвращает отчёт о задержках и пропускной способности """
+
+    latencies = []
+    results = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(simulated_player(host, port, deadline, latencies, results, bet, stand_on)
+                           for _ in range(players)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    rounds = sum(results.values())
+    report = {"players": players, "seconds": elapsed, "rounds": rounds, "requests": len(latencies),
+              "rounds_per_second": rounds / elapsed, "requests_per_second": len(latencies) / elapsed,
+              "outcomes": results}
+    for percent in (50, 95, 99, 99.9):
+        index = min(len(latencies) - 1, int(len(latencies) * percent / 100))
+        report[f"p{percent}_ms"] = latencies[index] * 1000 if latencies else 0.0
+    report["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+    return report
+
+
+def main():
+    """ Запуск сервера или генератора нагрузки из командной строки """
+
+    parser = argparse.ArgumentParser(description="Multi-table blackjack server and load generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the game server")
+    load_parser = commands.add_parser("load", help="simulate players against a running server")
+    for command_parser in (serve_parser, load_parser):
+        command_parser.add_argument("--host", default=config.SERVER_HOST)
+        command_parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    serve_parser.add_argument("--seed", type=int)
+    load_parser.add_argument("--players", type=int, default=100)
+    load_parser.add_argument("--duration", type=float, default=10.0)
+    load_parser.add_argument("--bet", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(GameServer(args.seed).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = asyncio.run(load(args.host, args.port, args.players, args.duration, args.bet))
+    print(f"{report['players']} players, {report['seconds']:.1f} s: {report['rounds']} rounds "
+          f"({report['rounds_per_second']:.0f}/s), {report['requests']} requests ({report['requests_per_second']:.0f}/s)")
+    print("latency ms: " + "  ".join(f"p{percent} {report[f'p{percent}_ms']:.3f}" for percent in (50, 95, 99, 99.9)) +
+          f"  max {report['max_ms']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
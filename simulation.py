@@ -0,0 +1,125 @@
+"""
+Многопроцессная Монте-Карло симуляция раундов на game_objects.Shoe/Player.
+Раунды делятся между процессами, у каждого процесса свой поток случайных чисел,
+а итоги складываются в общие счётчики в разделяемой памяти
+"""
+
+import argparse
+import multiprocessing
+import os
+import engine
+import game_objects
+from rng import RandomService
+from engine import OUTCOMES
+
+# ставка в 2 единицы, чтобы выплата 3:2 оставалась целым числом
+BET = 2
+# сколько раундов процесс считает локально, прежде чем добавить их в общие счётчики
+FLUSH_EVERY = 10000
+# раундов в одной части: части и их потоки случайных чисел зависят только от зерна и количества раундов,
+# поэтому итоги с одним зерном одинаковы при любом количестве процессов
+CHUNK_ROUNDS = 10000
+
+# общие счётчики, башмак и стратегия игрока в процессе пула
+_counters = None
+_options = (1, 0, 17, (), False)
+
+
+def play_round(shoe, stand_on=17, double_on=()):
+    """ Разыгрывает один раунд с простой стратегией и возвращает его исход и выплату """
+
+    round_ = engine.Round(BET * 2, shoe)
+    round_.step(engine.BET, BET)
+    engine.play_strategy(round_, stand_on, double_on)
+    return round_.game_end_state, round_.payout
+
+
+def init_worker(counters, options):
+    """ Инициализация процесса пула: общие счётчики и параметры стратегии игрока """
+
+    global _counters, _options
+    _counters = counters
+    _options = options
+
+
+def flush(counts, net):
+    """ Добавляет локальные итоги процесса в общие счётчики """
+
+    with _counters.get_lock():
+        for i, key in enumerate(OUTCOMES):
+            _counters[i] += counts[key]
+        _counters[len(OUTCOMES)] += net
+
+
+def run_chunk(task):
+    """ Разыгрывает часть раундов с собственным потоком случайных чисел """
+
+    seed, index, rounds = task
+    # у каждой части свой независимый поток, зависящий только от зерна и номера части
+    rng = RandomService(seed).split(index)
+    decks, penetration, stand_on, double_on, bulk = _options
+    if bulk:
+        rng = rng.bulk()
+    shoe = game_objects.Shoe(decks, penetration, rng)
+    counts = dict.fromkeys(OUTCOMES, 0)
+    net = 0
+    for i in range(rounds):
+        game_end_state, payout = play_round(shoe, stand_on, double_on)
+        counts[game_end_state] += 1
+        net += payout
+        if (i + 1) % FLUSH_EVERY == 0:
+            flush(counts, net)
+            counts = dict.fromkeys(OUTCOMES, 0)
+            net = 0
+    flush(counts, net)
+
+
+def run(rounds, processes=None, seed=None, stand_on=17, double_on=(), decks=1, penetration=0,
+        chunk_rounds=CHUNK_ROUNDS, bulk=False):
+    """
+    Разыгрывает rounds раундов на пуле процессов.
+    По умолчанию колода перемешивается перед каждым раундом, как game_objects.Deck.
+    bulk - перемешивать перестановками, сгенерированными пачками в NumPy (RandomService.bulk)
+    Возвращает количество раундов по исходам и суммарный выигрыш игрока в ставках
+    """
+
+    processes = processes or os.cpu_count() or 1
+    seed = RandomService(seed).seed
+
+    counters = multiprocessing.Array("q", len(OUTCOMES) + 1)
+    chunks = max(1, -(-rounds // chunk_rounds))
+    tasks = [(seed, i, rounds // chunks + (i < rounds % chunks)) for i in range(chunks)]
+
+    with multiprocessing.Pool(processes, initializer=init_worker,
+                              initargs=(counters, (decks, penetration, stand_on, tuple(double_on), bulk))) as pool:
+        for _ in pool.imap_unordered(run_chunk, tasks):
+            pass
+
+    counts = {key: counters[i] for i, key in enumerate(OUTCOMES)}
+    return {"seed": seed, "rounds": rounds, "counts": counts, "net_units": counters[len(OUTCOMES)] / BET}
+
+
+def main():
+    """ Запуск симуляции из командной строки """
+
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of Black Jack rounds")
+    parser.add_argument("rounds", type=int)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stand-on", type=int, default=17)
+    parser.add_argument("--double-on", type=int, nargs="*", default=[])
+    parser.add_argument("--decks", type=int, default=1)
+    parser.add_argument("--penetration", type=float, default=0)
+    parser.add_argument("--bulk", action="store_true", help="shuffle with permutations generated in bulk by NumPy")
+    args = parser.parse_args()
+
+    result = run(args.rounds, args.processes, args.seed, args.stand_on, args.double_on, args.decks,
+                 args.penetration, bulk=args.bulk)
+    print(f"seed: {result['seed']}")
+    for key, count in result["counts"].items():
+        print(f"{key}: {count} ({count / args.rounds:.4%})")
+    print(f"net units: {result['net_units']} ({result['net_units'] / args.rounds:+.5f} per round)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Таблица базовой стратегии для правил этой игры.
+Ожидаемый выигрыш действий "stand", "hit" и "double" считается точно мемоизированной рекурсией
+(модель бесконечной колоды), без симуляции. Правила те же, что в engine.Round:
+крупье берёт карты, пока у него меньше 17 очков, удвоение даёт ровно одну карту
+и разрешено один раз, Блэк Джек двумя картами выплачивается 3:2
+"""
+
+import argparse
+import json
+from functools import lru_cache
+from game_objects import next_hand as add_card
+from messages import relative_payments_messages
+
+STAND = "stand"
+HIT = "hit"
+DOUBLE = "double"
+
+# очки карты и вероятность её выпадения: 2-9 по 1/13, десятки и картинки 4/13, туз (11 очков) 1/13
+CARD_PROBABILITIES = tuple((points, (4 if points == 10 else 1) / 13) for points in range(2, 12))
+
+# итоговые счета крупье: 17, 18, 19, 20, 21 и перебор
+DEALER_TOTALS = (17, 18, 19, 20, 21)
+BUST = 22
+
+NATURAL_EV = relative_payments_messages["black_jack"]
+
+
+@lru_cache(maxsize=None)
+def dealer_distribution(total, soft):
+    """ Распределение итогового счёта крупье, начиная с руки (total, soft): словарь счёт -> вероятность """
+
+    if total > 21:
+        return {BUST: 1.0}
+    if total >= 17:
+        return {total: 1.0}
+    distribution = {}
+    for points, probability in CARD_PROBABILITIES:
+        for final, p in dealer_distribution(*add_card(total, soft, points)).items():
+            distribution[final] = distribution.get(final, 0) + probability * p
+    return distribution
+
+
+def upcard_distribution(upcard):
+    """ Распределение итогового счёта крупье по его открытой карте (туз = 11) """
+
+    return dealer_distribution(upcard, upcard == 11)
+
+
+@lru_cache(maxsize=None)
+def stand_ev(total, upcard):
+    """ Ожидаемый выигрыш, если игрок остановится на счёте total """
+
+    if total > 21:
+        return relative_payments_messages["player_busts"]
+    ev = 0.0
+    for final, p in upcard_distribution(upcard).items():
+        if final == BUST:
+            ev += p * relative_payments_messages["dealer_busts"]
+        elif total > final:
+            ev += p * relative_payments_messages["player_wins"]
+        elif total < final:
+            ev += p * relative_payments_messages["dealer_wins"]
+        else:
+            ev += p * relative_payments_messages["tie"]
+    return ev
+
+
+@lru_cache(maxsize=None)
+def hit_ev(total, soft, upcard):
+    """ Ожидаемый выигрыш, если игрок возьмёт карту и дальше будет играть оптимально """
+
+    ev = 0.0
+    for points, probability in CARD_PROBABILITIES:
+        new_total, new_soft = add_card(total, soft, points)
+        if new_total > 21:
+            ev += probability * relative_payments_messages["player_busts"]
+        else:
+            ev += probability * best_ev(new_total, new_soft, upcard)
+    return ev
+
+
+@lru_cache(maxsize=None)
+def double_ev(total, soft, upcard):
+    """ Ожидаемый выигрыш удвоения: ставка удваивается, игрок получает ровно одну карту """
+
+    ev = 0.0
+    for points, probability in CARD_PROBABILITIES:
+        new_total, new_soft = add_card(total, soft, points)
+        ev += probability * stand_ev(new_total, upcard)
+    return 2 * ev
+
+
+@lru_cache(maxsize=None)
+def best_ev(total, soft, upcard):
+    """ Ожидаемый выигрыш лучшего действия. Удвоение в игре разрешено в любой момент до первого удвоения """
+
+    return max(stand_ev(total, upcard), hit_ev(total, soft, upcard), double_ev(total, soft, upcard))
+
+
+def states():
+    """ Все состояния таблицы: жёсткие счета 4-21, мягкие 12-21 и открытые карты крупье 2-11 """
+
+    for upcard in range(2, 12):
+        for total in range(4, 22):
+            yield total, False, upcard
+        for total in range(12, 22):
+            yield total, True, upcard
+
+
+class StrategyTable:
+    """ Таблица решений с поиском за O(1) """
+
+    def __init__(self, cells=None):
+        # ключ (total, soft, upcard) -> {"stand": ev, "hit": ev, "double": ev, "best": действие}
+        self.cells = {} if cells is None else cells
+
+    @classmethod
+    def solve(cls):
+        """ Вычисляет полную таблицу """
+
+        cells = {}
+        for total, soft, upcard in states():
+            evs = {STAND: stand_ev(total, upcard), HIT: hit_ev(total, soft, upcard),
+                   DOUBLE: double_ev(total, soft, upcard)}
+            evs["best"] = max((STAND, HIT, DOUBLE), key=evs.get)
+            cells[(total, soft, upcard)] = evs
+        return cls(cells)
+
+    def decision(self, total, soft, upcard, can_double=True):
+        """ Возвращает лучшее действие для состояния """
+
+        cell = self.cells[(total, soft, upcard)]
+        if cell["best"] == DOUBLE and not can_double:
+            return STAND if cell[STAND] >= cell[HIT] else HIT
+        return cell["best"]
+
+    def ev(self, total, soft, upcard, action):
+        """ Возвращает ожидаемый выигрыш действия в состоянии """
+
+        return self.cells[(total, soft, upcard)][action]
+
+    def to_json(self):
+        """ Сериализует таблицу в JSON """
+
+        return json.dumps({f"{total},{int(soft)},{upcard}": cell
+                           for (total, soft, upcard), cell in self.cells.items()})
+
+    @classmethod
+    def from_json(cls, text):
+        """ Загружает таблицу из JSON """
+
+        cells = {}
+        for key, cell in json.loads(text).items():
+            total, soft, upcard = (int(i) for i in key.split(","))
+            cells[(total, bool(soft), upcard)] = cell
+        return cls(cells)
+
+    def save(self, path):
+        """ Сохраняет таблицу в файл """
+
+        with open(path, "w") as file:
+            file.write(self.to_json())
+
+    @classmethod
+    def load(cls, path):
+        """ Загружает таблицу из файла """
+
+        with open(path, "r") as file:
+            return cls.from_json(file.read())
+
+
+def round_ev(table=None):
+    """ Ожидаемый выигрыш раунда при игре по таблице, с учётом Блэк Джека двумя картами """
+
+    ev = 0.0
+    for upcard, p_up in CARD_PROBABILITIES:
+        for first, p_first in CARD_PROBABILITIES:
+            for second, p_second in CARD_PROBABILITIES:
+                total, soft = add_card(*add_card(0, False, first), second)
+                if total == 21:
+                    cell_ev = NATURAL_EV
+                elif table is None:
+                    cell_ev = best_ev(total, soft, upcard)
+                else:
+                    cell_ev = table.ev(total, soft, upcard, table.decision(total, soft, upcard))
+                ev += p_up * p_first * p_second * cell_ev
+    return ev
+
+
+def main():
+    """ Вычисляет таблицу и сохраняет её в файл """
+
+    parser = argparse.ArgumentParser(description="Solve the basic strategy table for this game's rules")
+    parser.add_argument("path", nargs="?", default="strategy.json")
+    args = parser.parse_args()
+
+    table = StrategyTable.solve()
+    table.save(args.path)
+    letters = {STAND: "S", HIT: "H", DOUBLE: "D"}
+    print("      " + " ".join(f"{upcard:>2}" for upcard in range(2, 12)))
+    for soft, totals in ((False, range(4, 22)), (True, range(12, 22))):
+        for total in totals:
+            row = " ".join(f"{letters[table.decision(total, soft, upcard)]:>2}" for upcard in range(2, 12))
+            print(f"{'S' if soft else 'H'}{total:<4} {row}")
+    print(f"round EV: {round_ev(table):+.5f}")
+
+
+if __name__ == "__main__":
+    main()
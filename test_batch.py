@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import batch
+import engine
+from history import StackedDeck
+from rng import RandomService
+
+
+@pytest.mark.parametrize("stand_on, double_on", [(17, ()), (12, (9, 10, 11)), (19, (11,))])
+def test_matches_engine_round(stand_on, double_on):
+    decks = batch.shuffled_decks(2000, RandomService(stand_on))
+    result = batch.play(len(decks), stand_on, double_on, decks=decks)
+    for i, deck in enumerate(decks):
+        # колода раздаётся в том же порядке: игрок, игрок, крупье (закрытая), крупье, затем добор
+        game_round = engine.Round(4, StackedDeck(deck.tolist()))
+        game_round.step(engine.BET, 2)
+        engine.play_strategy(game_round, stand_on, double_on)
+        assert batch.OUTCOMES[result.outcomes[i]] == game_round.game_end_state
+        assert result.doubled[i] == game_round.is_bid_doubled
+        assert result.player_values[i] == game_round.player.get_value()
+        assert result.dealer_values[i] == game_round.dealer.get_value()
+        assert result.units[i] * 2 == game_round.payout
+
+
+def test_hand_totals():
+    totals, soft = batch.hand_totals([[11, 11, 0], [10, 11, 0], [10, 6, 11], [11, 5, 0]])
+    assert totals.tolist() == [12, 21, 17, 16]
+    assert soft.tolist() == [True, True, False, True]
+
+
+def test_shuffled_decks_are_permutations():
+    decks = batch.shuffled_decks(100, RandomService(1))
+    assert decks.shape == (100, batch.DECK_SIZE)
+    assert (np.sort(decks, axis=1) == np.arange(batch.DECK_SIZE)).all()
+    assert (decks == batch.shuffled_decks(100, RandomService(1))).all()
@@ -0,0 +1,17 @@
+import os
+import benchmark
+import config
+
+
+def test_run_does_not_touch_player_data(tmp_path, monkeypatch):
+    paths = {"LEDGER_PATH": tmp_path / "ledger.bin", "HISTORY_PATH": tmp_path / "history.bin",
+             "SAVE_MONEY_PATH": tmp_path / "money.txt"}
+    for name, path in paths.items():
+        monkeypatch.setattr(config, name, str(path))
+    monkeypatch.setattr(config, "IDLE_WAIT", config.IDLE_WAIT)
+
+    result = benchmark.run(frames=3, width=640, height=360, scenarios=["bet", "finish"])
+    assert set(result["scenarios"]) == {"bet", "finish"}
+    for name, path in paths.items():
+        assert getattr(config, name) == str(path)
+        assert not os.path.exists(path)
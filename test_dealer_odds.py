@@ -0,0 +1,72 @@
+from fractions import Fraction
+import dealer_odds
+from dealer_odds import DealerOdds, FINALS, FULL_DECK, RANK_POINTS, remove
+from game_objects import next_hand
+
+
+def reference(total, soft, counts):
+    """ Распределение итогов прямым перебором добора без кэша (точные дроби) """
+
+    if total > 21:
+        return {"bust": Fraction(1)}
+    if total >= 17:
+        return {total: Fraction(1)}
+    remaining = sum(counts)
+    if remaining == 0:
+        return {"under_17": Fraction(1)}
+    result = {}
+    for rank, count in enumerate(counts):
+        if count:
+            sub = reference(*next_hand(total, soft, RANK_POINTS[rank]), remove(counts, rank))
+            for final, p in sub.items():
+                result[final] = result.get(final, 0) + Fraction(count, remaining) * p
+    return result
+
+
+def assert_matches(result, expected):
+    for final, p in zip(FINALS, result):
+        assert abs(p - float(expected.get(final, 0))) < 1e-12
+
+
+def test_matches_reference_for_small_compositions():
+    odds = DealerOdds()
+    for counts in ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), (0,) * 10, (3, 2, 1, 0, 0, 0, 0, 0, 0, 1),
+                   (0, 0, 0, 0, 0, 0, 0, 0, 0, 3), (2, 1, 0, 1, 0, 1, 0, 0, 3, 1)):
+        for upcard in range(10):
+            points = RANK_POINTS[upcard]
+            assert_matches(odds.probabilities(upcard, counts), reference(points, points == 11, counts))
+
+
+def test_full_deck_sums_to_one():
+    odds = DealerOdds()
+    for upcard in range(10):
+        result = odds.probabilities(upcard, remove(FULL_DECK, upcard))
+        assert abs(sum(result) - 1) < 1e-12
+        assert result[dealer_odds.UNDER_17] == 0
+
+
+def test_removal_reuses_draw_trees():
+    odds = DealerOdds()
+    shoe = tuple(count * 6 for count in FULL_DECK)
+    odds.probabilities(0, shoe)
+    cold_misses = odds.misses
+    assert cold_misses > 1
+
+    hits, misses = odds.hits, odds.misses
+    odds.probabilities(0, remove(shoe, 4))
+    # новый состав - один промах, все деревья добора уже построены
+    assert odds.misses - misses == 1
+    assert odds.hits - hits >= 1
+
+    hits, misses = odds.hits, odds.misses
+    odds.probabilities(0, remove(shoe, 4))
+    assert (odds.hits - hits, odds.misses - misses) == (1, 0)
+
+
+def test_lru_is_bounded():
+    odds = DealerOdds(maxsize=3)
+    counts = FULL_DECK
+    for rank in range(6):
+        counts = remove(counts, rank)
+        odds.probabilities(8, counts)
+    assert len(odds.cache) == 3
@@ -0,0 +1,136 @@
+import pytest
+import engine
+from game_objects import Card
+from messages import cant_bid_zero_message, not_enough_money_message
+
+
+class StackedDeck:
+    """ Колода с заданным порядком карт: игрок, игрок, крупье (закрытая), крупье, затем добор """
+
+    def __init__(self, *values):
+        self.cards = [Card(value, i % 4) for i, value in enumerate(values)][::-1]
+        self.revealed = []
+
+    def start_round(self):
+        pass
+
+    def deal_card(self, face_up=True):
+        return self.cards.pop()
+
+    def reveal(self, card):
+        self.revealed.append(card)
+
+
+def new_round(*values, balance=100, bid=10):
+    game_round = engine.Round(balance, StackedDeck(*values))
+    assert game_round.step(engine.BET, bid) is None
+    return game_round
+
+
+def test_bet_validation():
+    game_round = engine.Round(100, StackedDeck(10, 10, 10, 10))
+    assert game_round.step(engine.BET, 101) == not_enough_money_message
+    assert game_round.step(engine.BET, 0) == cant_bid_zero_message
+    assert game_round.state == engine.BETTING
+    assert game_round.step(engine.BET, 100) is None
+    assert game_round.state == engine.PLAYING
+    with pytest.raises(ValueError):
+        game_round.step(engine.BET, 10)
+
+
+def test_actions_outside_playing_state():
+    game_round = engine.Round(100, StackedDeck(10, 10, 10, 10))
+    with pytest.raises(ValueError):
+        game_round.step(engine.HIT)
+    game_round.step(engine.BET, 10)
+    with pytest.raises(ValueError):
+        game_round.step("split")
+    game_round.step(engine.STAND)
+    with pytest.raises(ValueError):
+        game_round.step(engine.STAND)
+
+
+@pytest.mark.parametrize("values, actions, outcome, payout", [
+    # 10 + 6, добор 10 - перебор игрока
+    ((10, 6, 10, 7, 10), (engine.HIT,), "player_busts", -10),
+    # у крупье 16, добирает 10
+    ((10, 8, 10, 6, 10), (engine.STAND,), "dealer_busts", 10),
+    ((14, 13, 10, 9), (engine.STAND,), "black_jack", 15),
+    ((10, 10, 10, 8), (engine.STAND,), "player_wins", 10),
+    ((10, 7, 10, 9), (engine.STAND,), "dealer_wins", -10),
+    ((10, 8, 10, 8), (engine.STAND,), "tie", 0),
+    # 21 тремя картами - обычная победа, не Блэк Джек
+    ((10, 5, 10, 9, 6), (engine.HIT, engine.STAND), "player_wins", 10),
+])
+def test_outcomes(values, actions, outcome, payout):
+    game_round = new_round(*values)
+    for action in actions:
+        assert game_round.step(action) is None
+    assert game_round.state == engine.FINISHED
+    assert game_round.game_end_state == outcome
+    assert game_round.payout == payout
+    assert game_round.balance == 100 + payout
+    assert game_round.actions == list(actions)
+
+
+def test_blackjack_payout_is_truncated():
+    game_round = new_round(14, 10, 10, 9, bid=3)
+    game_round.step(engine.STAND)
+    assert game_round.payout == int(3 * 1.5)
+
+
+def test_double_wins_doubled_bet():
+    game_round = new_round(6, 5, 10, 8, 10)
+    assert game_round.can_double()
+    assert game_round.step(engine.DOUBLE) is None
+    assert game_round.bid == 20 and game_round.is_bid_doubled
+    assert game_round.player.get_value() == 21
+    assert not game_round.can_hit()
+    with pytest.raises(ValueError):
+        game_round.step(engine.HIT)
+    with pytest.raises(ValueError):
+        game_round.step(engine.DOUBLE)
+    game_round.step(engine.STAND)
+    assert game_round.game_end_state == "player_wins"
+    assert game_round.payout == 20
+    assert game_round.actions == [engine.DOUBLE, engine.STAND]
+
+
+def test_double_with_insufficient_balance():
+    game_round = new_round(6, 5, 10, 8, 10, balance=100, bid=60)
+    assert not game_round.can_double()
+    assert game_round.step(engine.DOUBLE) == not_enough_money_message
+    assert game_round.state == engine.PLAYING
+    assert game_round.bid == 60 and not game_round.is_bid_doubled
+    assert game_round.actions == []
+    assert game_round.step(engine.HIT) is None
+
+
+def test_bust_on_double_loses_doubled_bet():
+    game_round = new_round(10, 6, 10, 8, 10)
+    assert game_round.step(engine.DOUBLE) is None
+    assert game_round.state == engine.FINISHED
+    assert game_round.game_end_state == "player_busts"
+    assert game_round.payout == -20
+    assert game_round.balance == 80
+    # крупье не добирает карты, если игрок уже проиграл
+    assert len(game_round.dealer.cards) == 2
+
+
+def test_hole_card_is_revealed_once_at_settlement():
+    game_round = new_round(10, 6, 9, 8, 10)
+    assert game_round.deck.revealed == []
+    game_round.step(engine.HIT)
+    assert game_round.deck.revealed == [Card(9, 2)]
+    assert game_round.dealt == [Card(10, 0), Card(6, 1), Card(9, 2), Card(8, 3), Card(10, 0)]
+
+
+def test_cards_are_dealt_only_after_the_bet():
+    deck = StackedDeck(10, 6, 9, 8)
+    game_round = engine.Round(100, deck)
+    assert game_round.step(engine.BET, 101) == not_enough_money_message
+    assert len(deck.cards) == 4 and game_round.dealt == []
+    assert not game_round.player.cards and not game_round.dealer.cards
+    game_round.step(engine.BET, 10)
+    assert deck.cards == []
+    assert game_round.player.get_value() == 16
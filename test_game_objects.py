@@ -0,0 +1,93 @@
+import random
+import pytest
+from counting import CardCounter, TAGS
+from dealer_odds import composition
+from game_objects import Card, CARDS, Player, Shoe
+from rng import RandomService
+
+
+def recount(cards):
+    """ Счёт руки полным пересчётом: тузы по 11, пока рука не переберёт """
+
+    total = sum(card.points for card in cards)
+    aces = sum(card.value == 14 for card in cards)
+    while total > 21 and aces:
+        total -= 10
+        aces -= 1
+    return total, aces > 0
+
+
+def test_incremental_score_matches_recount():
+    rng = random.Random(10)
+    # руки с большим числом тузов и мелких карт, чтобы проверить мягкие суммы и добор после перебора
+    small = [card for card in CARDS if card.value <= 5 or card.value == 14]
+    for _ in range(20000):
+        pool = small if rng.random() < 0.5 else CARDS
+        player = Player()
+        cards = []
+        for _ in range(rng.randint(1, 12)):
+            card = rng.choice(pool)
+            player.add_card(card)
+            cards.append(card)
+            total, soft = recount(cards)
+            assert player.get_value() == total
+            assert player.is_soft() == soft
+            assert player.is_bust() == (total > 21)
+            assert player.is_blackjack() == (len(cards) == 2 and total == 21)
+
+
+def test_cards_are_singletons():
+    assert Card(14, 3) is CARDS[51]
+    assert Card(2, 0) is CARDS[0]
+    for card in CARDS:
+        assert Card(card.value, card.suit) is card
+    with pytest.raises(AttributeError):
+        CARDS[0].value = 3
+
+
+@pytest.mark.parametrize("value, suit", [(1, 0), (15, 0), (2, -1), (14, 4), (0, 2)])
+def test_card_rejects_out_of_range(value, suit):
+    with pytest.raises(ValueError):
+        Card(value, suit)
+
+
+def test_shoe_reshuffles_only_discards_mid_round():
+    shoe = Shoe(1, 1.0, RandomService(3))
+    counter = CardCounter(shoe)
+    shoe.start_round()
+    previous = [shoe.deal_card() for _ in range(48)]
+    shoe.start_round()
+    hole = shoe.deal_card(face_up=False)
+    table = [hole] + [shoe.deal_card() for _ in range(9)]
+    # четыре карты до конца башмака, затем шесть из перемешанного сброса
+    assert shoe.shuffles == 2
+    assert len(set(table)) == len(table)
+    assert set(table[4:]) <= set(previous)
+    assert shoe.remaining() == 42
+    assert shoe.composition() == composition(set(CARDS) - set(table))
+    # закрытая карта ещё не учтена счётом, после открытия счёт совпадает с полным пересчётом
+    assert counter.composition() == composition(set(CARDS) - set(table[1:]))
+    shoe.reveal(hole)
+    assert counter.composition() == shoe.composition()
+    assert counter.running_count("hi_lo") == sum(TAGS["hi_lo"][card.rank] for card in table)
+
+
+def test_shoe_without_discards_cannot_deal_past_the_end():
+    shoe = Shoe(1, 1.0, RandomService(4))
+    shoe.start_round()
+    for _ in range(52):
+        shoe.deal_card()
+    with pytest.raises(RuntimeError):
+        shoe.deal_card()
+
+
+def test_counter_attached_with_hole_card_out():
+    shoe = Shoe(1, 0.75, RandomService(5))
+    shoe.start_round()
+    hole = shoe.deal_card(face_up=False)
+    upcard = shoe.deal_card()
+    counter = CardCounter(shoe)
+    assert counter.composition() == composition(set(CARDS) - {upcard})
+    shoe.reveal(hole)
+    assert counter.composition() == shoe.composition()
+    assert counter.running_count("hi_lo") == TAGS["hi_lo"][hole.rank] + TAGS["hi_lo"][upcard.rank]
@@ -0,0 +1,94 @@
+import os
+import pytest
+import config
+import engine
+import game_objects
+import history
+from rng import RandomService
+
+
+def play_rounds(count, seed):
+    """ Раунды на башмаке с простой стратегией, как в history.record """
+
+    shoe = game_objects.Shoe(config.SHOE_DECKS, config.SHOE_PENETRATION, RandomService(seed))
+    rounds = []
+    for _ in range(count):
+        game_round = engine.Round(history.BET * 2, shoe)
+        game_round.step(engine.BET, history.BET)
+        engine.play_strategy(game_round, 17, (10, 11))
+        rounds.append(game_round)
+    return rounds
+
+
+def assert_same(records, rounds):
+    assert len(records) == len(rounds)
+    for record, game_round in zip(records, rounds):
+        assert record.outcome == game_round.game_end_state
+        assert record.payout == game_round.payout
+        assert list(record.cards) == [card.index for card in game_round.dealt]
+        assert [history.ACTIONS[code] for code in record.actions] == game_round.actions
+        assert history.replay(record)
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, compress):
+    path = str(tmp_path / "history.bin")
+    rounds = play_rounds(300, seed=1)
+    with history.HistoryWriter(path, compress, block_records=64) as writer:
+        for game_round in rounds:
+            writer.write(game_round)
+    assert_same(list(history.read_history(path)), rounds)
+    assert history.verify(path) == (300, [])
+
+
+def test_append_to_existing_file(tmp_path):
+    path = str(tmp_path / "history.bin")
+    first = play_rounds(100, seed=2)
+    second = play_rounds(50, seed=3)
+    with history.HistoryWriter(path, block_records=32) as writer:
+        for game_round in first:
+            writer.write(game_round)
+    with history.HistoryWriter(path, block_records=32) as writer:
+        for game_round in second:
+            writer.write(game_round)
+    assert_same(list(history.read_history(path)), first + second)
+
+
+def test_torn_block_is_dropped_on_append(tmp_path):
+    path = str(tmp_path / "history.bin")
+    first = play_rounds(40, seed=4)
+    with history.HistoryWriter(path, block_records=40) as writer:
+        for game_round in first:
+            writer.write(game_round)
+    size = os.path.getsize(path)
+    # сбой посреди записи блока: заголовок без данных
+    with open(path, "ab") as file:
+        file.write(history.BLOCK.pack(0, 5, 1000))
+    assert len(list(history.read_history(path))) == 40
+
+    second = play_rounds(10, seed=5)
+    with history.HistoryWriter(path) as writer:
+        assert os.path.getsize(path) == size
+        for game_round in second:
+            writer.write(game_round)
+    assert_same(list(history.read_history(path)), first + second)
+
+
+def test_tampered_record_fails_replay(tmp_path):
+    path = str(tmp_path / "history.bin")
+    rounds = play_rounds(20, seed=6)
+    with history.HistoryWriter(path, compress=False) as writer:
+        for game_round in rounds:
+            writer.write(game_round)
+    record = next(history.read_history(path))
+    assert not history.replay(record._replace(payout=record.payout + 1))
+    assert not history.replay(record._replace(cards=record.cards[:-1]))
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "history.bin"
+    path.write_bytes(b"not a history")
+    with pytest.raises(ValueError):
+        history.HistoryWriter(str(path))
+    with pytest.raises(ValueError):
+        list(history.read_history(str(path)))
@@ -0,0 +1,140 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import ledger
+from ledger import Ledger, LedgerLockedError, RECORD_SIZE, MAGIC
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ledger.bin")
+
+
+def test_new_ledger_starts_with_default_balance(path):
+    with Ledger(path, default=5000) as book:
+        assert book.balance == 5000
+    assert os.path.getsize(path) == len(MAGIC) + RECORD_SIZE
+    assert ledger.read_balance(path) == 5000
+
+
+def test_records_survive_reopen(path):
+    with Ledger(path, default=100) as book:
+        book.deposit(50)
+        book.deposit(-30)
+    with Ledger(path) as book:
+        assert book.balance == 120
+        assert book.records == 3
+        assert [record.payout for record in book.history()] == [100, 50, -30]
+
+
+def test_torn_tail_is_truncated(path):
+    with Ledger(path, default=100) as book:
+        book.deposit(10)
+    size = os.path.getsize(path)
+    # сбой посреди записи: половина следующей записи в конце файла
+    with open(path, "ab") as file:
+        file.write(b"\x01" * (RECORD_SIZE // 2))
+    with Ledger(path) as book:
+        assert book.balance == 110
+        book.deposit(5)
+    assert os.path.getsize(path) == size + RECORD_SIZE
+    assert ledger.read_balance(path) == 115
+
+
+def test_corrupted_record_ends_the_log(path):
+    with Ledger(path, default=100) as book:
+        book.deposit(10)
+        book.deposit(20)
+    with open(path, "r+b") as file:
+        file.seek(len(MAGIC) + RECORD_SIZE + 3)
+        file.write(b"\xff")
+    with Ledger(path) as book:
+        assert book.balance == 100
+        assert book.records == 1
+
+
+def test_snapshot_plus_replay(path):
+    with Ledger(path, default=100, snapshot_interval=3) as book:
+        for _ in range(4):
+            book.deposit(1)
+    with open(path + ".snapshot") as file:
+        snapshot = json.load(file)
+    assert snapshot["records"] == 3
+    assert snapshot["balance"] == 102
+    # записи после снимка дочитываются из журнала
+    with Ledger(path) as book:
+        assert book.balance == 104
+        assert book.records == 5
+
+
+def test_bad_snapshot_falls_back_to_full_replay(path):
+    with Ledger(path, default=100, snapshot_interval=2) as book:
+        book.deposit(1)
+        book.deposit(1)
+    with open(path + ".snapshot", "w") as file:
+        json.dump({"offset": 7, "balance": 10 ** 6, "records": 1}, file)
+    with Ledger(path) as book:
+        assert book.balance == 102
+
+
+def test_group_commit_and_flush_if_due(path):
+    book = Ledger(path, default=0, group_size=4, group_time=60)
+    book.deposit(1)
+    assert len(book.pending) == 1
+    assert ledger.read_balance(path) == 0
+    book.flush_if_due()
+    assert len(book.pending) == 1
+    book.group_time = 0
+    book.flush_if_due()
+    assert book.pending == []
+    assert ledger.read_balance(path) == 1
+    book.close()
+
+
+def test_flushed_records_survive_a_crash(path):
+    code = (f"import os, ledger\n"
+            f"book = ledger.Ledger({path!r}, default=5000, group_size=16, group_time=60)\n"
+            f"book.deposit(100)\n"
+            f"book.flush()\n"
+            f"book.deposit(1)\n"
+            f"os._exit(0)\n")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(ledger.__file__)))
+    # сброшенная запись сохранилась, несброшенная потеряна
+    assert ledger.read_balance(path) == 5100
+
+
+def test_lock_contention(path):
+    book = Ledger(path)
+    with pytest.raises(LedgerLockedError):
+        Ledger(path)
+    # занятый журнал можно прочитать без блокировки
+    assert ledger.read_balance(path) == book.balance
+    book.close()
+    with Ledger(path) as book:
+        assert book.balance == 5000
+
+
+def test_lock_held_by_another_process(path):
+    code = (f"import sys, ledger\n"
+            f"book = ledger.Ledger({path!r})\n"
+            f"print('locked', flush=True)\n"
+            f"sys.stdin.read()\n")
+    process = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               cwd=os.path.dirname(os.path.abspath(ledger.__file__)), text=True)
+    try:
+        assert process.stdout.readline().strip() == "locked"
+        with pytest.raises(LedgerLockedError):
+            Ledger(path)
+    finally:
+        process.communicate("")
+    with Ledger(path) as book:
+        assert book.balance == 5000
+
+
+def test_legacy_money_file_is_migrated(tmp_path, path):
+    legacy = tmp_path / "money.txt"
+    legacy.write_text("1234")
+    with Ledger(path, legacy_path=str(legacy)) as book:
+        assert book.balance == 1234
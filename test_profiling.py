@@ -0,0 +1,22 @@
+from profiling import FrameStats
+
+
+def test_dropped_frames_use_the_budget_in_effect():
+    stats = FrameStats(size=10, max_fps=60)
+    # кадр без фокуса окна при 10 FPS укладывается в свой бюджет
+    stats.add(0.001, 0.001, 0.001, 0.097, fps=10)
+    assert stats.dropped == 0
+    stats.add(0.001, 0.001, 0.001, 0.2, fps=10)
+    assert stats.dropped == 1
+    # без fps - бюджет max_fps
+    stats.add(0.001, 0.001, 0.001, 0.03)
+    assert stats.dropped == 2
+    stats.add(0.001, 0.001, 0.001, 0.01)
+    assert (stats.dropped, stats.frames) == (2, 4)
+
+
+def test_unlimited_frame_rate_uses_default_budget():
+    stats = FrameStats(size=10, max_fps=60)
+    stats.add(0.001, 0.001, 0.001, 0.01, fps=0)
+    stats.add(0.001, 0.001, 0.001, 0.05, fps=0)
+    assert stats.dropped == 1
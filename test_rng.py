@@ -0,0 +1,34 @@
+import random
+import pytest
+from rng import RandomService
+
+
+def test_random_methods_match_random_random():
+    service = RandomService(7)
+    reference = random.Random("7")
+    assert service.random() == reference.random()
+    assert service.randrange(52) == reference.randrange(52)
+    items, expected = list(range(52)), list(range(52))
+    service.shuffle(items)
+    reference.shuffle(expected)
+    assert items == expected
+
+
+def test_auto_and_explicit_keys_do_not_collide():
+    root = RandomService(7)
+    auto = [root.split() for _ in range(3)]
+    explicit = [root.split(i) for i in range(3)]
+    streams = {service.path for service in auto + explicit}
+    assert len(streams) == 6
+    assert len({service.random() for service in auto + explicit}) == 6
+    assert len({service.numpy().random() for service in auto + explicit}) == 6
+
+
+def test_split_is_reproducible():
+    first, second = RandomService(7), RandomService(7)
+    assert first.split(3).split().random() == second.split(3).split().random()
+    assert [s.path for s in first.spawn(2)] == [s.path for s in second.spawn(2)]
+    with pytest.raises(ValueError):
+        first.split(-1)
+    with pytest.raises(ValueError):
+        first.split("1")
@@ -0,0 +1,27 @@
+import server
+from rng import RandomService
+
+
+def test_refused_bet_does_not_deal_cards():
+    table = server.Table(balance=100, rng=RandomService(1))
+    position = table.shoe.position
+    assert table.handle(server.BET, 101) == server.REFUSED
+    assert table.handle(server.BET, 0) == server.REFUSED
+    assert table.shoe.position == position
+    assert table.round is None
+    assert table.handle(server.BET, 100) == server.OK
+    assert table.shoe.position == position + 4
+
+
+def test_round_updates_balance_and_response():
+    table = server.Table(balance=100, rng=RandomService(2))
+    assert table.handle(server.HIT) == server.ERROR
+    assert table.handle(server.BET, 10) == server.OK
+    assert table.handle(server.BET, 10) == server.ERROR
+    state = server.decode(table.encode(server.OK)[server.LENGTH.size:])
+    assert state["state"] == "playing" and state["outcome"] is None
+    assert state["dealer"][0] == server.HIDDEN_CARD
+    assert table.handle(server.STAND) == server.OK
+    state = server.decode(table.encode(server.OK)[server.LENGTH.size:])
+    assert state["state"] == "finished"
+    assert state["balance"] == 100 + state["payout"] == table.balance
@@ -0,0 +1,14 @@
+import simulation
+
+
+def test_same_seed_gives_same_totals_for_any_process_count():
+    results = [simulation.run(25000, processes, seed=1, double_on=(10, 11), decks=6, penetration=0.75,
+                              chunk_rounds=4000)
+               for processes in (1, 3)]
+    assert results[0] == results[1]
+    assert sum(results[0]["counts"].values()) == 25000
+
+
+def test_chunks_cover_all_rounds():
+    result = simulation.run(999, 2, seed=2, chunk_rounds=100)
+    assert sum(result["counts"].values()) == 999
@@ -4,10 +4,17 @@
 Метод update этого класса вызывается каждые 0.02 секунды (60 FPS (Зависит от self.MAX_FPS))
 """
 
-import os
 import pygame
 import config
+import engine
 import game_objects
+from card_atlas import get_atlas
+from counting import CardCounter
+from dispatcher import InputDispatcher
+from history import HistoryWriter
+from ledger import Ledger, LedgerLockedError, read_balance
+from profiling import startup
+from renderer import DirtyRenderer
 from objects import *
 from messages import *
 
@@ -33,30 +40,148 @@ class Game:
 
         # настройки игры, которые можно менять (стандартные настройки)
         self.scroll_scale = 40
-        self.background_image = pygame.transform.scale(pygame.image.load("background.jpg"), [self.app.WIDTH, self.app.HEIGHT])
 
         self.prev_mouse_pos = [0, 0]
+        self.renderer = DirtyRenderer(self.app.DISPLAY)
+        # обработчики ввода текущей фазы игры
+        self.input = InputDispatcher()
+
+        # ресурсы и первая сцена создаются при первом обращении, чтобы быстрее показать первый кадр
+        self._background_image = None
+        self._shoe = None
+        self._counter = None
+        self._ledger = None
+        self._history = None
+        self.scene_created = False
+
+    @property
+    def background_image(self):
+        """ Фон, загружаемый при первой отрисовке """
+
+        if self._background_image is None:
+            with startup.measure("background.jpg"):
+                image = pygame.image.load("background.jpg").convert()
+                self._background_image = pygame.transform.scale(image, [self.app.WIDTH, self.app.HEIGHT])
+        return self._background_image
+
+    @property
+    def shoe(self):
+        """ Башмак общий для всех раундов и перемешивается только на отрезной карте """
+
+        if self._shoe is None:
+            self.shoe = game_objects.Shoe(config.SHOE_DECKS, config.SHOE_PENETRATION)
+        return self._shoe
+
+    @shoe.setter
+    def shoe(self, shoe):
+        self._shoe = shoe
+        self._counter = CardCounter(shoe)
+
+    @property
+    def counter(self):
+        """ Счёт карт башмака (Hi-Lo, KO, Omega II) по картам, которые видит игрок """
+
+        if self._counter is None:
+            self.shoe
+        return self._counter
+
+    @property
+    def ledger(self):
+        """
+        Журнал банкролла, открываемый при первом обращении. Старый файл money.txt переносится в него.
+        None, если журнал открыт другим запущенным приложением (попытка повторяется при следующем обращении)
+        """
+
+        if self._ledger is None:
+            try:
+                self._ledger = Ledger(config.LEDGER_PATH, config.LEDGER_FSYNC, config.LEDGER_GROUP_SIZE,
+                                      config.LEDGER_GROUP_TIME, config.LEDGER_SNAPSHOT_INTERVAL,
+                                      legacy_path=config.SAVE_MONEY_PATH)
+            except LedgerLockedError:
+                return None
+        return self._ledger
 
-        self.create_menu_objects()
+    @property
+    def history(self):
+        """ Файл истории раундов, открываемый при первой записи (None, если история не ведётся) """
 
-    @staticmethod
-    def save_money(money: int):
-        """ Сохраняет деньги игрока в файл """
+        if self._history is None and config.HISTORY_PATH is not None:
+            self._history = HistoryWriter(config.HISTORY_PATH, config.HISTORY_COMPRESS, config.HISTORY_BLOCK_RECORDS)
+        return self._history
 
-        with open(config.SAVE_MONEY_PATH, "w") as file:
-            file.write(str(money))
+    def close(self):
+        """ Сохраняет несброшенные записи журнала и истории раундов при выходе """
 
-    def load_money(self, default=5000):
-        """ Загружает деньги игрока из файла. Если его не существует, функция вернёт default """
+        if self._ledger is not None:
+            self._ledger.close()
+        if self._history is not None:
+            self._history.close()
 
-        if os.path.exists(config.SAVE_MONEY_PATH):
-            with open(config.SAVE_MONEY_PATH, "r") as file:
-                try:
-                    return int(file.readline())
-                except ValueError:
-                    return default
-        self.save_money(default)
-        return default
+    def create_scene(self):
+        """ Создаёт объекты текущей фазы игры, если они ещё не созданы """
+
+        if self.scene_created:
+            return
+        self.scene_created = True
+        with startup.measure(f"scene {self.mode}"):
+            if self.mode == "menu":
+                self.create_menu_objects()
+            elif self.mode == "rules":
+                self.create_rules_objects()
+            elif self.mode == "info":
+                self.create_info_objects()
+            elif self.mode == "game":
+                self.create_game_objects()
+
+    def save_round(self):
+        """ Записывает рассчитанный раунд в журнал банкролла и историю раундов """
+
+        # раунд сразу сбрасывается на диск: между раундами журнал никто не сбрасывает,
+        # поэтому группировка записей остаётся для пакетной записи
+        self.ledger.record_round(self.round)
+        self.ledger.flush()
+        if self.history is not None:
+            self.history.write(self.round)
+
+    def load_money(self):
+        """ Возвращает баланс игрока из журнала банкролла (только для чтения, если журнал занят) """
+
+        if self.ledger is None:
+            return read_balance(config.LEDGER_PATH)
+        return self.ledger.balance
+
+    # состояние раунда хранится в engine.Round, Game только отображает его
+    @property
+    def deck(self):
+        return self.round.deck
+
+    @property
+    def player(self):
+        return self.round.player
+
+    @property
+    def dealer(self):
+        return self.round.dealer
+
+    @property
+    def bid(self):
+        return self.round.bid
+
+    @property
+    def player_balance(self):
+        return self.round.balance
+
+    @property
+    def is_bid(self):
+        return self.round.state == engine.BETTING
+
+    @property
+    def is_bid_doubled(self):
+        return self.round.is_bid_doubled
+
+    @property
+    def game_end_state(self):
+        return self.round.game_end_state
 
     def create_menu_objects(self):
         """ Инициализация объектов меню """
@@ -67,6 +192,11 @@ class Game:
         self.info_button = Button(self, text=button_info_message).percent_y(60)
         self.exit_button = Button(self, text=button_exit_message).percent_y(75)
 
+        self.input.add(self.play_button, on_click=lambda event: self.change_mode("game"))
+        self.input.add(self.rules_button, on_click=lambda event: self.change_mode("rules"))
+        self.input.add(self.info_button, on_click=lambda event: self.change_mode("info"))
+        self.input.add(self.exit_button, on_click=self.exit)
+
         self.menu_objects.append(self.game_title_label)
         self.menu_objects.append(self.play_button)
         self.menu_objects.append(self.rules_button)
@@ -79,9 +209,13 @@ class Game:
         self.rules_label = Label(self, text=rules_title_message).center_x()
         self.rules_text = Text(self, text=rules_text_message, font_size=50).center_x()
         self.rules_text.update_y(self.rules_label.size[1] // 2, percent_x(self, 25))
-        self.rules_label.pos[1] = self.rules_text.pos_list[0][1] - self.rules_label.size[1] // 2
+        self.rules_label.pos[1] = self.rules_text.pos[1] - self.rules_label.size[1] // 2
         self.back_button = Button(self, text=button_back_message).percent(8, 50)
 
+        self.input.add(self.back_button, on_click=self.back_to_menu)
+        self.input.bind_key(pygame.K_ESCAPE, self.back_to_menu)
+        self.input.bind(pygame.MOUSEWHEEL, self.scroll_rules_text)
+
         self.rules_objects.append(self.rules_label)
         self.rules_objects.append(self.rules_text)
         self.rules_objects.append(self.back_button)
@@ -93,6 +227,10 @@ class Game:
         # self.bot_button = Button(self, text="True Midjourney", font_size=50, foreground=(0, 200, 255), italic=True).percent(3, 70)
         self.back_button = Button(self, text=button_back_message).percent(8, 50)
 
+        self.input.add(self.back_button, on_click=self.back_to_menu)
+        self.input.bind_key(pygame.K_ESCAPE, self.back_to_menu)
+        self.input.bind(pygame.MOUSEWHEEL, self.scroll_info_text)
+
         self.info_objects.append(self.info_text)
         # self.info_objects.append(self.bot_button)
         self.info_objects.append(self.back_button)
@@ -100,20 +238,12 @@ class Game:
     def create_game_objects(self):
         """ Инициализация объектов игры """
 
-        self.is_bid = True
-        self.is_bid_doubled = False
         self.is_finish = False
         self.start_finish_game_counter = False
-        self.WIN = False
-        self.LOSE = False
-        self.TIE = False
         self.finish_game_counter = 0
-        self.game_end_state = ""
 
-        self.player_balance = self.load_money(5000)
-        self.player_cards_count = 2
-        self.dealer_cards_count = 2
-        self.bid = 0
+        # инициализация раунда (логики игры). Карты раздаются из башмака только после ставки
+        self.round = engine.Round(self.load_money(), self.shoe)
 
         self.CARD_SHOW_STEP = 500
 
@@ -121,54 +251,47 @@ class Game:
         self.CARD_HEIGHT = 230
         self.CARD_MARGIN_X = 11.5
         self.CARD_MARGIN_Y = 9
+        self.card_atlas = get_atlas(card_size=(self.CARD_WIDTH, self.CARD_HEIGHT),
+                                    margin=(self.CARD_MARGIN_X, self.CARD_MARGIN_Y))
 
         # переменные для сохранения состояния скролла карт
         self.dragging = False
         self.drag_offset_x = 0
+        self.player_cards = []
+        self.dealer_cards = []
+
+        self.create_bid_objects()
+        self.create_game_widgets()
+
+    def create_card_objects(self):
+        """ Спрайты карт, розданных после ставки (первая карта крупье скрыта) """
+
+        self.player_cards_count = len(self.player.cards)
+        self.dealer_cards_count = len(self.dealer.cards)
         self.player_cards_width = self.player_cards_count * (self.CARD_WIDTH + self.CARD_MARGIN_X)
         self.dealer_cards_width = self.dealer_cards_count * (self.CARD_WIDTH + self.CARD_MARGIN_X)
 
-        # инициализация игровых объектов логики игры
-        self.deck = game_objects.Deck()
-        self.player = game_objects.Player()
-        self.dealer = game_objects.Player()
-
-        for i in range(self.player_cards_count):
-            self.player.add_card(self.deck.deal_card())
-        for i in range(self.dealer_cards_count):
-            self.dealer.add_card(self.deck.deal_card())
-
-        # колода карт игрока представленная числами от 2 до 14
-        x1 = [card.value for card in self.player.cards]
-        y1 = [card.suit for card in self.player.cards]
-
-        # колода карт крупье представленная числами от 2 до 14
-        x2 = [card.value for card in self.dealer.cards]
-        y2 = [card.suit for card in self.dealer.cards]
-        x2[0] = 15
-        y2[0] = 2
-
-        self.player_cards = [Card(
-            self, pygame.transform.scale(pygame.image.load("cards.png"), (2529, 947)),
-            image_pos=[-(x1[i] - 2) * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                       -y1[i] * (self.CARD_HEIGHT + self.CARD_MARGIN_Y)],
-            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
-            pos=[(self.app.WIDTH - self.player_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                 -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT]
-        ) for i in range(self.player_cards_count)]
-
-        self.dealer_cards = [Card(
-            self, pygame.transform.scale(pygame.image.load("cards.png"), (2529, 947)),
-            image_pos=[-(x2[i] - 2) * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                       -y2[i] * (self.CARD_HEIGHT + self.CARD_MARGIN_Y)],
-            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
-            pos=[(self.app.WIDTH - self.dealer_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                 -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT],
-            stop_show_percent=10
-        ) for i in range(self.dealer_cards_count)]
+        player_sprites = [self.card_atlas.sprite(card) for card in self.player.cards]
+        dealer_sprites = [self.card_atlas.sprite(card) for card in self.dealer.cards]
+        dealer_sprites[0] = self.card_atlas.back()
 
-        self.create_bid_objects()
-        self.create_game_widgets()
+        self.player_cards = [self.create_card(player_sprites[i], i, self.player_cards_width,
+                                              -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT)
+                             for i in range(self.player_cards_count)]
+
+        self.dealer_cards = [self.create_card(dealer_sprites[i], i, self.dealer_cards_width,
+                                              -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT, stop_show_percent=10)
+                             for i in range(self.dealer_cards_count)]
+
+    def create_card(self, sprite, i, cards_width, y, stop_show_percent=70):
+        """ Создаёт графическое представление i-й карты в ряду по спрайту из общего атласа карт """
+
+        return Card(
+            self, sprite,
+            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
+            pos=[(self.app.WIDTH - cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X), y],
+            stop_show_percent=stop_show_percent
+        )
 
     def create_game_widgets(self):
         """ Инициализация элементов интерфейса игры """
@@ -206,6 +329,12 @@ class Game:
         self.start_game_button = Button(self, text=start_game_message).percent_y(75)
         self.back_button = Button(self, text=button_back_message).percent(8, 80)
 
+        self.input.add(self.bid_entry, on_hover=self.bid_entry.set_focused, on_focus=self.bid_entry.set_selected,
+                       on_key=self.enter_bid_key)
+        self.input.add(self.start_game_button, on_click=lambda event: self.check_start_game())
+        self.input.add(self.back_button, on_click=self.back_to_menu)
+        self.input.bind_key(pygame.K_ESCAPE, self.back_to_menu)
+
         self.bid_objects.append(self.bid_main_label)
         self.bid_objects.append(self.balance_label)
         self.bid_objects.append(self.cant_play_label)
@@ -214,6 +343,12 @@ class Game:
         self.bid_objects.append(self.start_game_button)
         self.bid_objects.append(self.back_button)
 
+    def enter_bid_key(self, event):
+        """ Ввод ставки с клавиатуры. Ширина поля меняется вместе с текстом, поэтому сетка ввода перестраивается """
+
+        self.bid_entry.enter_key(pygame.key.name(event.key))
+        self.input.invalidate()
+
     def change_mode(self, mode):
         """
         Меняет фазу приложения на другую
@@ -232,6 +367,8 @@ class Game:
 
         self.mode = mode
         clear()
+        self.renderer.invalidate()
+        self.input = InputDispatcher()
         if mode == "menu":
             self.create_menu_objects()
         elif mode == "rules":
@@ -240,6 +377,7 @@ class Game:
             self.create_info_objects()
         elif mode == "game":
             self.create_game_objects()
+        self.scene_created = True
 
     def scroll_info_text(self, event):
         """ Позволяет скролить self.info_text """
@@ -260,71 +398,97 @@ class Game:
             if self.rules_label.pos[1] > self.app.HEIGHT - self.rules_label.size[1] // 2 - self.rules_text.size[1] // 2:
                 self.rules_label.pos[1] = self.app.HEIGHT - self.rules_label.size[1] // 2 - self.rules_text.size[1] // 2
 
-            self.rules_text.update_y(self.rules_text.pos[1] + event.y * self.scroll_scale, percent_x(self, 25))
-            if self.rules_text.pos_list[0][1] < self.app.HEIGHT - self.rules_text.size[1]:
-                self.rules_text.update_y(self.app.HEIGHT - self.rules_text.size[1], percent_x(self, 25))
-            if self.rules_text.pos_list[0][1] > self.app.HEIGHT - self.rules_text.size[1] // 2:
-                self.rules_text.update_y(self.app.HEIGHT - self.rules_text.size[1] // 2, percent_x(self, 25))
+            y = self.rules_text.pos[1] + event.y * self.scroll_scale
+            y = max(y, self.app.HEIGHT - self.rules_text.size[1])
+            y = min(y, self.app.HEIGHT - self.rules_text.size[1] // 2)
+            self.rules_text.update_y(y, percent_x(self, 25))
 
     def check_start_game(self):
         """ Проверяет, может ли игрок зайти в игру с его ставкой """
 
-        bid = int(self.bid_entry.text)
-        if bid > self.player_balance:
-            self.cant_play_label.update_text(not_enough_money_message)
+        if self.ledger is None:
+            self.cant_play_label.update_text(ledger_locked_message)
             self.cant_play_label.percent_y(42)
             return
-        if bid <= 0:
-            self.cant_play_label.update_text(cant_bid_zero_message)
+        error = self.round.step(engine.BET, int(self.bid_entry.text))
+        if error:
+            self.cant_play_label.update_text(error)
             self.cant_play_label.percent_y(42)
             return
-        self.bid = bid
+        self.create_card_objects()
+        self.score_label.update_text(score_message.format(self.player.get_value()))
         self.bid_label.update_text(bid_message.format(self.bid))
-        self.is_bid = False
+        self.create_play_input()
+
+    def create_play_input(self):
+        """ Обработчики ввода во время раунда: кнопки действий и перетаскивание карт игрока """
+
+        self.input = InputDispatcher()
+        self.input.add(self.hit_button, on_click=lambda event: self.add_player_card())
+        self.input.add(self.stand_button, on_click=lambda event: self.dealer_turn())
+        self.input.add(self.double_bid_button, on_click=lambda event: self.double_bid())
+        for card in self.player_cards:
+            self.input.add(card, on_drag=self.drag_cards)
+
+    def drag_cards(self, event):
+        """ Перетаскивание ряда карт игрока мышью """
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.dragging = True
+            self.prev_mouse_pos = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.dragging = False
+            self.input.invalidate()
+        elif event.type == pygame.MOUSEMOTION and percent_x(self, 30) < event.pos[0] < percent_x(self, 70):
+            mouse_dx = event.pos[0] - self.prev_mouse_pos[0]
+            for card in self.player_cards:
+                card.pos[0] += mouse_dx
+            self.prev_mouse_pos = event.pos
+
+    def back_to_menu(self, event=None):
+        """ Возвращает в меню """
+
+        self.change_mode("menu")
+
+    def exit(self, event=None):
+        """ Завершает приложение """
+
+        self.app.RUN = False
 
     def add_player_card(self):
         """ Выдаёт игроку одну карту из колоды """
 
-        self.player.add_card(self.deck.deal_card())
+        if not self.round.can_hit():
+            return
+        self.round.step(engine.HIT)
+        self.show_player_cards()
+
+        if self.round.state == engine.FINISHED:
+            self.finish()
+
+    def show_player_cards(self):
+        """ Создаёт спрайты для новых карт игрока и выравнивает ряд карт """
+
         self.score_label.update_text(score_message.format(self.player.get_value()))
-        x1 = [card.value for card in self.player.cards]
-        y1 = [card.suit for card in self.player.cards]
-        i = self.player_cards_count
-        self.player_cards_count += 1
-        self.player_cards.append(Card(
-            self, pygame.transform.scale(pygame.image.load("cards.png"), (2529, 947)),
-            image_pos=[-(x1[i] - 2) * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                       -y1[i] * (self.CARD_HEIGHT + self.CARD_MARGIN_Y)],
-            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
-            pos=[(self.app.WIDTH - self.player_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                 -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT]
-        ))
+        for i in range(self.player_cards_count, len(self.player.cards)):
+            self.player_cards.append(self.create_card(self.card_atlas.sprite(self.player.cards[i]), i,
+                                                      self.player_cards_width,
+                                                      -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT))
+            self.input.add(self.player_cards[-1], on_drag=self.drag_cards)
+        self.player_cards_count = len(self.player_cards)
         self.player_cards_width = self.player_cards_count * (self.CARD_WIDTH + self.CARD_MARGIN_X)
         for i, card in enumerate(self.player_cards):
             card.pos[0] = (self.app.WIDTH - self.player_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X)
 
-        if self.player.get_value() > 21:
-            self.LOSE = True
-            self.game_end_state = "player_busts"
-            self.finish()
+    def show_dealer_cards(self):
+        """ Создаёт спрайты для новых карт крупье и выравнивает ряд карт """
 
-    def add_dealer_card(self):
-        """ Выдаёт крупье одну карту из колоды """
-
-        self.dealer.add_card(self.deck.deal_card())
-        x2 = [card.value for card in self.dealer.cards]
-        y2 = [card.suit for card in self.dealer.cards]
-        i = self.dealer_cards_count
-        self.dealer_cards_count += 1
-        self.dealer_cards.append(Card(
-            self, pygame.transform.scale(pygame.image.load("cards.png"), (2529, 947)),
-            image_pos=[-(x2[i] - 2) * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                       -y2[i] * (self.CARD_HEIGHT + self.CARD_MARGIN_Y)],
-            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
-            pos=[(self.app.WIDTH - self.dealer_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                 -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT],
-            stop_show_percent=10
-        ))
+        for i in range(self.dealer_cards_count, len(self.dealer.cards)):
+            self.dealer_cards.append(self.create_card(self.card_atlas.sprite(self.dealer.cards[i]), i,
+                                                      self.dealer_cards_width,
+                                                      -i * self.CARD_SHOW_STEP - self.CARD_HEIGHT,
+                                                      stop_show_percent=10))
+        self.dealer_cards_count = len(self.dealer_cards)
         self.dealer_cards_width = self.dealer_cards_count * (self.CARD_WIDTH + self.CARD_MARGIN_X)
         for i, card in enumerate(self.dealer_cards):
             card.pos[0] = (self.app.WIDTH - self.dealer_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X)
@@ -332,197 +496,146 @@ class Game:
     def dealer_turn(self):
         """ Логика крупье """
 
-        while self.dealer.get_value() < 17:
-            self.add_dealer_card()
-        self.finish_game_counter = 100
-        self.start_finish_game_counter = True
+        if self.round.state != engine.PLAYING:
+            return
+        self.round.step(engine.STAND)
+        self.show_dealer_cards()
 
-        if self.dealer.get_value() > 21:
-            self.WIN = True
-            self.game_end_state = "dealer_busts"
+        if self.game_end_state == "dealer_busts":
             self.finish()
+            return
+        self.finish_game_counter = 100
+        self.start_finish_game_counter = True
 
     def reveal_dealer_card(self):
         """ Открывает скрытую карту крупье """
 
-        x2 = [card.value for card in self.dealer.cards]
-        y2 = [card.suit for card in self.dealer.cards]
-        self.dealer_cards = [Card(
-            self, pygame.transform.scale(pygame.image.load("cards.png"), (2529, 947)),
-            image_pos=[-(x2[i] - 2) * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                       -y2[i] * (self.CARD_HEIGHT + self.CARD_MARGIN_Y)],
-            size=[self.CARD_WIDTH, self.CARD_HEIGHT],
-            pos=[(self.app.WIDTH - self.dealer_cards_width) // 2 + i * (self.CARD_WIDTH + self.CARD_MARGIN_X),
-                 percent_y(self, 7)],
-            stop_show_percent=10
-        ) for i in range(self.dealer_cards_count)]
+        self.dealer_cards = [self.create_card(self.card_atlas.sprite(card), i, self.dealer_cards_width,
+                                              percent_y(self, 7), stop_show_percent=10)
+                             for i, card in enumerate(self.dealer.cards)]
 
     def double_bid(self):
         """ Удваивает ставку игрока """
 
-        if self.player_balance >= self.bid * 2:
-            self.is_bid_doubled = True
-            self.add_player_card()
-            self.bid *= 2
+        if self.round.state != engine.PLAYING or self.is_bid_doubled:
+            return
+        if self.round.step(engine.DOUBLE) is None:
+            self.show_player_cards()
             self.bid_label.update_text(bid_message.format(self.bid))
             self.double_bid_button.update_text(bid_doubled_message)
+            # у кнопки новый текст и новый размер
+            self.input.invalidate()
+            if self.round.state == engine.FINISHED:
+                self.finish()
 
     def finish(self):
         """ Финиш игры """
 
         self.reveal_dealer_card()
         self.is_finish = True
-        player_value = self.player.get_value()
-        dealer_value = self.dealer.get_value()
-
-        if self.game_end_state == "":
-            if player_value > dealer_value:
-                self.WIN = True
-                self.game_end_state = "player_wins"
-            elif player_value < dealer_value:
-                self.LOSE = True
-                self.game_end_state = "dealer_wins"
-            else:
-                self.TIE = True
-                self.game_end_state = "tie"
-        if self.player_cards_count == 2 and player_value == 21:
-            self.WIN = True
-            self.game_end_state = "black_jack"
-        self.save_money(self.player_balance + int(self.bid * relative_payments_messages[self.game_end_state]))
+        self.save_round()
         self.create_finish_objects()
 
     def create_finish_objects(self):
         """ Инициализация объектов финиша игры """
 
         self.player_state_label = Label(self)
-        if self.WIN:
+        if self.round.is_win():
             self.player_state_label.update_text(win_message)
-        if self.LOSE:
+        if self.round.is_lose():
             self.player_state_label.update_text(lose_message)
-        if self.TIE:
+        if self.round.is_tie():
             self.player_state_label.update_text(tie_message)
         self.player_state_label.percent_y(35)
         self.description_label = Label(self, text=game_end_messages[self.game_end_state], font_size=70).percent_y(45)
         self.back_button = Button(self, text=button_exit_message, foreground=(255, 255, 255), font_size=70).percent(10, 10)
         self.prize_label = (Label(self, font_size=70,
-                                  text=prize_message.format(int(self.bid * relative_payments_messages[self.game_end_state])))
+                                  text=prize_message.format(self.round.payout))
                             .percent_y(55))
 
+        self.input = InputDispatcher()
+        self.input.add(self.back_button, on_click=self.back_to_menu)
+        self.input.bind_key(pygame.K_ESCAPE, self.back_to_menu)
+
         self.finish_objects.append(self.player_state_label)
         self.finish_objects.append(self.description_label)
         self.finish_objects.append(self.prize_label)
         self.finish_objects.append(self.back_button)
 
-    def update(self, mouse_buttons, mouse_position, events, keys):
-        """ Основная логика игры """
+    def update(self, events):
+        """ Основная логика игры. Отрисовка кадра выполняется отдельно в методе draw """
 
-        if self.mode == "menu":
-            self.app.DISPLAY.blit(self.background_image, (0, 0))
-
-            for obj in self.menu_objects:
-                obj.update()
-
-            if self.play_button.clicked(mouse_buttons, mouse_position):
-                self.change_mode("game")
-            if self.rules_button.clicked(mouse_buttons, mouse_position):
-                self.change_mode("rules")
-            if self.info_button.clicked(mouse_buttons, mouse_position):
-                self.change_mode("info")
-            if self.exit_button.clicked(mouse_buttons, mouse_position):
-                self.app.RUN = False
-
-        if self.mode == "rules":
-            self.app.DISPLAY.blit(self.background_image, (0, 0))
+        self.create_scene()
 
-            for obj in self.rules_objects:
-                obj.update()
+        # обработчик ввода берётся для каждого события, потому что событие может сменить фазу игры
+        for event in events:
+            self.input.dispatch(event)
 
-            for event in events:
-                self.scroll_rules_text(event)
-
-            if self.back_button.clicked(mouse_buttons, mouse_position) or keys[pygame.K_ESCAPE]:
-                self.change_mode("menu")
+        if self.mode != "game" or self.is_bid:
+            return
 
-        if self.mode == "info":
-            self.app.DISPLAY.blit(self.background_image, (0, 0))
+        if any(card.is_moving() for card in self.player_cards):
+            self.input.invalidate()
+        for card in self.player_cards:
+            card.move()
+        for card in self.dealer_cards:
+            card.move()
 
-            for obj in self.info_objects:
-                obj.update()
+        if self.start_finish_game_counter:
+            if self.finish_game_counter > 0:
+                self.finish_game_counter -= self.app.delta_time * self.app.MAX_FPS
+            else:
+                self.finish()
+                self.start_finish_game_counter = False
 
-            for event in events:
-                self.scroll_info_text(event)
+    def is_animating(self):
+        """
+        Проверяет, нужно ли обновлять игру с полной частотой кадров: идёт анимация появления карт,
+        отсчёт до финиша игры или перетаскивание карт
+        """
 
-            if keys[pygame.K_ESCAPE]:
-                self.change_mode("menu")
+        if not self.scene_created:
+            return True
+        if self.mode == "game" and not self.is_bid:
+            if self.dragging or self.start_finish_game_counter:
+                return True
+            return any(card.is_moving() for card in self.player_cards + self.dealer_cards)
+        return False
 
-            if self.back_button.clicked(mouse_buttons, mouse_position) or keys[pygame.K_ESCAPE]:
-                self.change_mode("menu")
+    def get_drawables(self):
+        """ Возвращает объекты текущей фазы игры в порядке отрисовки """
 
+        if self.mode == "menu":
+            return self.menu_objects
+        if self.mode == "rules":
+            return self.rules_objects
+        if self.mode == "info":
+            return self.info_objects
         if self.mode == "game":
-            self.app.DISPLAY.blit(self.background_image, (0, 0))
-
             if self.is_bid:
-                if self.back_button.clicked(mouse_buttons, mouse_position) or keys[pygame.K_ESCAPE]:
-                    self.change_mode("menu")
-
-                for event in events:
-                    if event.type == pygame.KEYDOWN:
-                        self.bid_entry.enter_key(pygame.key.name(event.key))
-
-                if self.bid_entry.clicked(mouse_buttons, mouse_position):
-                    self.bid_entry.is_selected = True
-                if self.start_game_button.clicked(mouse_buttons, mouse_position):
-                    self.check_start_game()
+                return self.bid_objects
+            drawables = self.player_cards + self.dealer_cards + [self.borders] + self.game_objects
+            if self.is_finish:
+                drawables += self.finish_objects
+            return drawables
+        return []
 
-                for obj in self.bid_objects:
-                    obj.update()
+    def draw(self):
+        """
+        Рисует кадр. В режиме config.DIRTY_RECTS перерисовываются только изменившиеся области,
+        и метод возвращает их список для pygame.display.update
+        """
 
-                return
+        self.create_scene()
+        drawables = self.get_drawables()
+        if self.app.overlay is not None and self.app.overlay.visible:
+            drawables = drawables + [self.app.overlay]
 
-            for card in self.player_cards:
-                card.update()
-            for card in self.dealer_cards:
-                card.update()
-            self.borders.update()
-            for obj in self.game_objects:
-                obj.update()
+        if config.DIRTY_RECTS:
+            if self.renderer.background is None:
+                self.renderer.set_background(self.background_image)
+            return self.renderer.render(drawables)
 
-            if self.is_finish:
-                if self.back_button.clicked(mouse_buttons, mouse_position) or keys[pygame.K_ESCAPE]:
-                    self.change_mode("menu")
-
-                for obj in self.finish_objects:
-                    obj.update()
-
-                return
-
-            for event in events:
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    for card in self.player_cards:
-                        if touched(card.pos[0], card.size[0], event.pos[0], 1,
-                                   card.pos[1], card.size[1], event.pos[1], 1):
-                            self.dragging = True
-                            self.drag_offset_x = event.pos[0] - card.pos[0]
-                            self.prev_mouse_pos = event.pos
-                            break
-                if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                    self.dragging = False
-                if (event.type == pygame.MOUSEMOTION and self.dragging and
-                        percent_x(self, 30) < event.pos[0] < percent_x(self, 70)):
-                    mouse_dx = event.pos[0] - self.prev_mouse_pos[0]
-                    for card in self.player_cards:
-                        card.pos[0] += mouse_dx
-                    self.prev_mouse_pos = event.pos
-
-            if self.hit_button.clicked(mouse_buttons, mouse_position) and not self.is_finish and not self.is_bid_doubled:
-                self.add_player_card()
-            if self.stand_button.clicked(mouse_buttons, mouse_position) and not self.is_finish:
-                self.dealer_turn()
-            if self.double_bid_button.clicked(mouse_buttons, mouse_position) and not self.is_bid_doubled and not self.is_finish:
-                self.double_bid()
-            if self.start_finish_game_counter:
-                if self.finish_game_counter > 0:
-                    self.finish_game_counter -= self.app.delta_time * self.app.MAX_FPS
-                else:
-                    self.finish()
-                    self.start_finish_game_counter = False
+        self.app.DISPLAY.blit(self.background_image, (0, 0))
+        for obj in drawables:
+            obj.draw()